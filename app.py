@@ -1,17 +1,60 @@
 # === Import Required Libraries ===
+# Kept light: pandas, sklearn, scipy and the Redis client are imported by the
+# background warm-up (or on first use), not when a worker imports the app
+import os
 import pickle  # For loading the pre-trained model
+import tempfile
+import threading
+import time
 import numpy as np
-import pandas as pd
-from flask import Flask, render_template, request, jsonify  # Web framework utilities
-from alibi_detect.cd import KSDrift  # KSDrift for concept/data drift detection
-from src.feature_store import (
-    RedisFeatureStore,
-)  # Custom module to fetch data from Redis
-from sklearn.preprocessing import StandardScaler  # For feature scaling
-from src.logger import get_logger  # Custom logging utility
+from dotenv import load_dotenv
+
+load_dotenv()  # Before the modules below read their settings from the environment
+
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+)  # Web framework utilities
+from src.feature_transformer import (
+    FeatureTransformer,
+    CATEGORICAL_FEATURES,
+    FEATURE_NAMES,
+)  # Shared feature engineering used in training
+from src.fast_inference import (
+    InlineScaler,
+    RowBuffers,
+    parse_form_row,
+)  # Pandas-free single-row serving path
+from src.model_format import FlatForest, load_model  # Memory-mapped forest format
+from src.model_registry import (
+    ModelHolder,
+    ModelRegistry,
+    ModelWatcher,
+    ServingModel,
+    warm_up,
+)  # Versioned models with background hot reload
+from src.readiness import WarmUp  # Background startup for /readyz
+from src.shadow import ShadowScorer  # Off-path shadow/canary model scoring
+from src.logger import SAMPLED, get_logger  # Async JSON logging utility
+from config.paths_config import (
+    FLAT_MODEL_PATH,
+    MODEL_PATH,
+    MODEL_REGISTRY_DIR,
+    TRANSFORMER_PATH,
+)
+from src.profiler import StackSampler  # Opt-in sampling profiler
 from prometheus_client import (
-    start_http_server,
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
     Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
 )  # For metrics monitoring via Prometheus
 
 # === Setup Logger ===
@@ -23,46 +66,259 @@ app = Flask(__name__, template_folder="templates")
 # === Prometheus Metrics Setup ===
 prediction_count = Counter("prediction_count", "Number of prediction requests made")
 drift_count = Counter("drift_count", "Number of times data drift was detected")
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+stage_latency = Histogram(
+    "prediction_stage_latency_seconds",
+    "Latency of each stage of the prediction request path",
+    ["endpoint", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+model_latency = Histogram(
+    "model_inference_latency_seconds",
+    "Model scoring latency, for the primary and the shadow model",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+shadow_rows = Counter(
+    "shadow_predictions",
+    "Rows scored by the shadow model, by agreement with the primary model",
+    ["outcome"],
+)
+shadow_dropped = Counter(
+    "shadow_dropped", "Shadow scoring requests dropped because the queue was full"
+)
+redis_pool_connections = Gauge(
+    "redis_pool_connections",
+    "Redis connection pool usage per worker",
+    ["host", "state"],
+    multiprocess_mode="livesum",
+)
+model_version = Gauge(
+    "model_version",
+    "Registry version of the model serving predictions (0 = unversioned pkl)",
+    multiprocess_mode="liveall",
+)
+SERVING_STAGES = ("parse", "scale", "drift", "inference", "render")
+predict_stages = {s: stage_latency.labels("predict", s) for s in SERVING_STAGES}
+api_stages = {s: stage_latency.labels("api_predict", s) for s in SERVING_STAGES}
+
+# === Opt-in Sampling Profiler (ENABLE_PROFILER=1) ===
+# Samples on its own thread so the worker keeps serving the traffic being
+# profiled; results go to a directory shared by all workers
+WORKER_TIMEOUT = float(os.getenv("GUNICORN_TIMEOUT", 30))  # gunicorn.conf.py
+PROFILER_ENABLED = os.getenv("ENABLE_PROFILER", "0").lower() in ("1", "true", "yes")
+PROFILER_MAX_SECONDS = max(1.0, WORKER_TIMEOUT - 5)
+PROFILER_DIR = os.getenv(
+    "PROFILER_DIR", os.path.join(tempfile.gettempdir(), "surviverflow_profiles")
+)
+profiler = StackSampler()
+
+# === Serving State (filled in by the background warm-up below) ===
+# Unpickling the model imports sklearn and the drift reference reads the whole
+# feature store, so a worker answers /healthz right after import and /readyz
+# once all of this has loaded
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "pickle")  # flat = memory-mapped forest
+registry = ModelRegistry(MODEL_REGISTRY_DIR, model_format=MODEL_FORMAT)
+model_holder = ModelHolder(None)
+row_buffers = RowBuffers(len(FEATURE_NAMES))
+WARMUP_SIZE = 64  # Drift reference rows each new model is warmed up on
+warmup_rows = None
+feature_store = None
+scaler = None
+fast_scaler = None
+ksd = None
+shadow = None
+
+
+# === Load Trained Model and Its Transformer (LATEST version, else legacy files) ===
+def load_legacy_transformer():
+    if os.path.exists(TRANSFORMER_PATH):
+        return FeatureTransformer.load(TRANSFORMER_PATH)
+    return None
+
+
+def load_serving_model():
+    transformer = None
+    if registry.latest_version() is not None:
+        version, model = registry.load()
+        transformer = registry.load_transformer(version)
+    elif MODEL_FORMAT == "flat" and os.path.exists(FLAT_MODEL_PATH):
+        version, model = 0, FlatForest.load(FLAT_MODEL_PATH)
+    else:
+        version = 0
+        with open(MODEL_PATH, "rb") as model_file:
+            model = pickle.load(model_file)
+    if transformer is None:  # Unversioned model, or registered without one
+        transformer = load_legacy_transformer()
+    predictor = warm_up(model, warmup_rows)
+    model_holder.swap(ServingModel(version, model, predictor, transformer))
+    model_version.set(version)
 
-# === Load Trained Model ===
-MODEL_PATH = "artifacts/models/random_forest_model.pkl"
-with open(MODEL_PATH, "rb") as model_file:
-    model = pickle.load(model_file)
-
-# === Define Feature Columns Used by Model ===
-FEATURE_NAMES = [
-    "Age",
-    "Fare",
-    "Pclass",
-    "Sex",
-    "Embarked",
-    "Familysize",
-    "Isalone",
-    "HasCabin",
-    "Title",
-    "Pclass_Fare",
-    "Age_Fare",
-]
 
-# === Initialize Redis Feature Store and Scaler ===
-feature_store = RedisFeatureStore()
-scaler = StandardScaler()
+# === Initialize Redis Feature Store (connects lazily through a shared pool) ===
+def connect_feature_store():
+    global feature_store
+    from src.feature_store import get_feature_store
 
+    feature_store = get_feature_store()
 
-# === Fit Scaler on Historical Reference Data ===
+
+# === Fit Scaler on the Snapshot's Bounded Drift Reference ===
 def fit_scaler_on_ref_data():
-    entity_ids = feature_store.get_all_entity_ids()  # Get entity IDs from Redis
-    all_features = feature_store.get_batch_features(entity_ids)  # Fetch batch features
-    all_features_df = pd.DataFrame.from_dict(all_features, orient="index")[
-        FEATURE_NAMES
-    ]  # Convert to DataFrame
-    scaler.fit(all_features_df)  # Fit the scaler on the historical data
-    return scaler.transform(all_features_df)  # Return scaled data
+    global scaler, warmup_rows
+    from sklearn.preprocessing import StandardScaler
+    from src.drift_reference import load_drift_reference
+
+    # A fixed-size, class-stratified sample stored with the snapshot (or
+    # its quantile sketches), rather than every entity in the store
+    drift_reference = load_drift_reference(feature_store)
+    reference = drift_reference.reference()
+    # Real feature rows, so warm-up exercises the paths live traffic takes
+    rows = drift_reference.sample(WARMUP_SIZE)
+    warmup_rows = rows if len(rows) else np.zeros((1, len(FEATURE_NAMES)))
+    scaler = StandardScaler().fit(reference)  # Fit on the historical data
+    return scaler.transform(reference)  # Return scaled data
 
 
 # === Prepare Drift Detector with Historical Data ===
-historical_data = fit_scaler_on_ref_data()
-ksd = KSDrift(x_ref=historical_data, p_val=0.05)  # Initialize KSDrift detector
+def load_reference_state():
+    """Fit the scaler and drift detector, and run one drift check to warm up."""
+    global fast_scaler, ksd
+    from src.drift import DriftDetector
+
+    historical_data = fit_scaler_on_ref_data()
+    detector = DriftDetector(
+        historical_data,
+        p_val=0.05,
+        categorical=[FEATURE_NAMES.index(c) for c in CATEGORICAL_FEATURES],
+    )
+    detector.predict(historical_data[:1])
+    fast_scaler, ksd = InlineScaler.from_standard_scaler(scaler), detector
+
+
+# === Hot Model Reload: Poll the Registry, Warm Up, Swap Between Requests ===
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", 30))  # 0 = off
+model_watcher = ModelWatcher(
+    registry,
+    model_holder,
+    warmup_rows=lambda: warmup_rows,
+    interval=MODEL_RELOAD_INTERVAL,
+    on_swap=model_version.set,
+)
+
+
+# === Shadow Model: Score a Sample of Traffic Off the Response Path ===
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", 0.1))
+# Shadow scoring competes with requests for the GIL: cap rows per sample
+SHADOW_MAX_ROWS = int(os.getenv("SHADOW_MAX_ROWS", 64))
+primary_latency = model_latency.labels("primary")
+shadow_latency = model_latency.labels("shadow")
+
+
+def record_shadow_result(agreed, total, seconds):
+    shadow_latency.observe(seconds)
+    shadow_rows.labels("agree").inc(agreed)
+    shadow_rows.labels("disagree").inc(total - agreed)
+
+
+def load_shadow_model():
+    global shadow
+    shadow = ShadowScorer(
+        warm_up(load_model(SHADOW_MODEL_PATH), warmup_rows),
+        sample_rate=SHADOW_SAMPLE_RATE,
+        max_rows=SHADOW_MAX_ROWS,
+        on_result=record_shadow_result,
+        on_drop=shadow_dropped.inc,
+    )
+    logger.info(f"Shadow model {SHADOW_MODEL_PATH} at {SHADOW_SAMPLE_RATE:.0%}")
+
+
+# === Background Warm-Up: Requests Get a 503 Until Ready ===
+# A sync worker blocked for the whole gunicorn timeout is killed, so by default
+# requests don't wait at all; an opt-in wait is capped well below the timeout
+READY_TIMEOUT = min(float(os.getenv("READY_TIMEOUT", 0)), WORKER_TIMEOUT / 3)
+warmup_steps = [
+    ("feature_store", connect_feature_store),
+    ("reference", load_reference_state),  # Also picks the model warm-up rows
+    ("model", load_serving_model),
+]
+if SHADOW_MODEL_PATH:
+    warmup_steps.append(("shadow", load_shadow_model))
+if MODEL_RELOAD_INTERVAL > 0:
+    warmup_steps.append(("model_watcher", model_watcher.start))
+# WARMUP_ON_IMPORT=0 defers the warm-up to the first request, so the import
+# can be profiled alone (-X importtime misattributes imports made on two threads)
+WARMUP_ON_IMPORT = os.getenv("WARMUP_ON_IMPORT", "1").lower() in ("1", "true", "yes")
+warmup = WarmUp(warmup_steps)
+if WARMUP_ON_IMPORT:
+    warmup.start()
+else:
+    app.before_request(warmup.start)  # A no-op once started
+
+
+def not_ready_response():
+    response = jsonify({"error": "Service is warming up", **warmup.status()})
+    return response, 503, {"Retry-After": "1"}
+
+
+def run_inference(stages, features, serving):
+    """Score with the serving model; a sample is re-scored by the shadow model."""
+    start = time.perf_counter()
+    probabilities = serving.predictor.predict_proba(features)
+    elapsed = time.perf_counter() - start
+    stages["inference"].observe(elapsed)
+    primary_latency.observe(elapsed)
+
+    if shadow is not None:
+        labels = serving.predictor.classes_[probabilities.argmax(axis=1)]
+        shadow.submit(features, labels)
+    return probabilities
+
+
+# === Redis Connection Pool Usage (collected at scrape time, not per request) ===
+POOL_METRICS_INTERVAL = float(os.getenv("POOL_METRICS_INTERVAL", 15))
+
+
+def record_pool_usage():
+    if feature_store is None:  # No pools until the warm-up connects the store
+        return
+    from src.feature_store import pool_stats  # Already imported by the warm-up
+
+    for url, stats in pool_stats().items():
+        host = url.rsplit("@", 1)[-1].split("://")[-1]  # Drop scheme/credentials
+        for state in ("in_use", "available", "created"):
+            if stats[state] is not None:  # None: not readable in this redis-py
+                redis_pool_connections.labels(host, state).set(stats[state])
+
+
+def refresh_pool_usage():
+    # /metrics is answered by one worker, which can only read its own pools:
+    # under gunicorn every worker refreshes its gauge files on a timer
+    while True:
+        time.sleep(POOL_METRICS_INTERVAL)
+        record_pool_usage()
+
+
+if os.getenv("PROMETHEUS_MULTIPROC_DIR") and POOL_METRICS_INTERVAL > 0:
+    threading.Thread(
+        target=refresh_pool_usage, name="pool-metrics", daemon=True
+    ).start()
 
 
 # === Home Route: Renders the Input Form UI ===
@@ -74,58 +330,41 @@ def home():
 # === Predict Route: Processes Form Input, Detects Drift, Returns Prediction ===
 @app.route("/predict", methods=["POST"])
 def predict():
+    if not warmup.wait(READY_TIMEOUT):
+        return not_ready_response()
     try:
-        # === Get Form Data from UI ===
-        data = request.form
-        Age = float(data["Age"])
-        Fare = float(data["Fare"])
-        Pclass = int(data["Pclass"])
-        Sex = int(data["Sex"])
-        Embarked = int(data["Embarked"])
-        Familysize = int(data["Familysize"])
-        Isalone = int(data["Isalone"])
-        HasCabin = int(data["HasCabin"])
-        Title = int(data["Title"])
-        Pclass_Fare = float(data["Pclass_Fare"])
-        Age_Fare = float(data["Age_Fare"])
-
-        # === Create DataFrame from Input Features ===
-        features = pd.DataFrame(
-            [
-                [
-                    Age,
-                    Fare,
-                    Pclass,
-                    Sex,
-                    Embarked,
-                    Familysize,
-                    Isalone,
-                    HasCabin,
-                    Title,
-                    Pclass_Fare,
-                    Age_Fare,
-                ]
-            ],
-            columns=FEATURE_NAMES,
-        )
+        # === Parse Form Data into a Preallocated Row (FEATURE_NAMES order) ===
+        with predict_stages["parse"].time():
+            features = parse_form_row(request.form, FEATURE_NAMES, row_buffers.raw)
 
-        # === Scale Features for Drift Detection ===
-        features_scaled = scaler.transform(features)
+        # === Scale Features for Drift Detection (inline mean/scale) ===
+        with predict_stages["scale"].time():
+            features_scaled = fast_scaler.transform(features, out=row_buffers.scaled)
 
         # === Detect Data Drift ===
-        drift = ksd.predict(features_scaled)
-        print("Drift Response : ", drift)
+        with predict_stages["drift"].time():
+            drift = ksd.predict(features_scaled)
 
         drift_response = drift.get("data", {})
         is_drift = drift_response.get("is_drift", None)
+        # Summary only: the drift flag and per-feature p-values
+        logger.info(
+            "Drift response",
+            extra={
+                **SAMPLED,
+                "is_drift": is_drift,
+                "p_val": drift_response.get("p_val"),
+            },
+        )
 
         if is_drift is not None and is_drift == 1:
-            print("Drift Detected....")
-            logger.info("Drift Detected....")
+            logger.info("Drift Detected....", extra=SAMPLED)
             drift_count.inc()  # Increment Prometheus drift counter
 
         # === Predict Using Model ===
-        prediction = model.predict(features)[0]
+        serving = model_holder.current  # One model for the whole request
+        probabilities = run_inference(predict_stages, features, serving)
+        prediction = serving.predictor.classes_[probabilities[0].argmax()]
         prediction_count.inc()  # Increment Prometheus prediction counter
 
         # === Format the Prediction for Display ===
@@ -136,24 +375,147 @@ def predict():
             result_text = "❌ The passenger is likely to <strong>Not Survive</strong>"
             result_class = "not-survived"
 
-        return render_template(
-            "index.html", prediction_text=result_text, result_class=result_class
-        )
+        with predict_stages["render"].time():
+            return render_template(
+                "index.html", prediction_text=result_text, result_class=result_class
+            )
 
     except Exception as e:
         return jsonify({"error": str(e)})
 
 
+# === API Predict Route: Scores Raw Passenger Records (JSON) ===
+@app.route("/api/predict", methods=["POST"])
+def api_predict():
+    if not warmup.wait(READY_TIMEOUT):
+        return not_ready_response()
+    try:
+        # The model and the transformer it was trained with, taken together
+        serving = model_holder.current
+        transformer = serving.transformer
+        if transformer is None:
+            raise RuntimeError(f"Feature transformer not found at {TRANSFORMER_PATH}")
+
+        payload = request.get_json(force=True)
+
+        # === Transform Raw Records (single-row fast path skips pandas) ===
+        with api_stages["parse"].time():
+            if isinstance(payload, dict):
+                features = row_buffers.raw
+                transformer.transform_record(payload, out=features[0])
+            else:
+                import pandas as pd  # Already loaded by the warm-up
+
+                features = transformer.transform_array(pd.DataFrame(payload))
+
+        with api_stages["scale"].time():
+            features_scaled = fast_scaler.transform(
+                features, out=row_buffers.scaled if features.shape[0] == 1 else None
+            )
+
+        # === Detect Data Drift on the Scaled Batch ===
+        with api_stages["drift"].time():
+            drift = ksd.predict(features_scaled)
+        is_drift = drift.get("data", {}).get("is_drift", None)
+        if is_drift is not None and is_drift == 1:
+            logger.info("Drift Detected....", extra=SAMPLED)
+            drift_count.inc()
+
+        # === Predict Using Model ===
+        probabilities = run_inference(api_stages, features, serving)
+        predictions = serving.predictor.classes_[probabilities.argmax(axis=1)]
+        prediction_count.inc(len(features))
+
+        with api_stages["render"].time():
+            return jsonify(
+                {
+                    "predictions": predictions.tolist(),
+                    "probabilities": probabilities[:, 1].tolist(),
+                    "is_drift": bool(is_drift),
+                    "model_version": serving.version,
+                }
+            )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+# === Health Checks: Liveness (/healthz) vs Readiness (/readyz) ===
+@app.route("/healthz")
+def healthz():
+    # The worker is up and answering; says nothing about the model or Redis
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz")
+def readyz():
+    status = warmup.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 # === Prometheus Metrics Endpoint ===
 @app.route("/metrics")
 def metrics():
-    from prometheus_client import generate_latest
-    from flask import Response
+    # Under gunicorn each worker writes to PROMETHEUS_MULTIPROC_DIR, so
+    # aggregate every worker's values instead of only the one answering
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        metrics_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(metrics_registry)
+    else:
+        metrics_registry = REGISTRY
+
+    record_pool_usage()
+    return Response(generate_latest(metrics_registry), content_type=CONTENT_TYPE_LATEST)
+
+
+# === Profiling Endpoints: Folded Stack Samples for Flamegraphs ===
+def profile_path(pid):
+    return os.path.join(PROFILER_DIR, f"profile-{pid}.folded")
+
 
-    return Response(generate_latest(), content_type="text/plain")
+def save_profile(counts):
+    os.makedirs(PROFILER_DIR, exist_ok=True)
+    tmp_path = f"{profile_path(os.getpid())}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(StackSampler.folded(counts))
+    os.replace(tmp_path, profile_path(os.getpid()))
+    logger.info(f"Captured {sum(counts.values())} profile samples")
+
+
+@app.route("/debug/profile", methods=["POST"])
+def start_profile():
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profiler is disabled (set ENABLE_PROFILER=1)"}), 404
+
+    try:
+        seconds = min(float(request.args.get("seconds", 10)), PROFILER_MAX_SECONDS)
+        interval = float(request.args.get("interval", profiler.interval))
+        profiler.start(seconds, interval=interval, on_done=save_profile)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    pid = os.getpid()
+    return (
+        jsonify({"pid": pid, "seconds": seconds, "result": f"/debug/profile/{pid}"}),
+        202,
+    )
+
+
+@app.route("/debug/profile/<int:pid>")
+def get_profile(pid):
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profiler is disabled (set ENABLE_PROFILER=1)"}), 404
+    if pid == os.getpid() and profiler.busy:
+        return jsonify({"status": "profiling"}), 202
+    try:
+        with open(profile_path(pid)) as f:
+            return Response(f.read(), content_type="text/plain")
+    except FileNotFoundError:
+        return jsonify({"error": f"No profile for worker {pid}"}), 404
 
 
-# === Start Flask and Prometheus Server ===
+# === Start Flask App (metrics are served by the /metrics route) ===
 if __name__ == "__main__":
-    start_http_server(8000)  # Expose metrics on port 8000
     app.run(debug=True, host="0.0.0.0", port=5000)  # Start Flask app
@@ -0,0 +1,160 @@
+"""
+Per-stage latency microbenchmark for the /predict request path.
+
+Compares the original pandas/sklearn path (DataFrame -> scaler.transform ->
+model.predict) with the serving fast path (preallocated row -> inline
+scaling -> unvalidated forest inference). Redis is not needed: the scaler
+and drift reference are fitted on the raw training CSV.
+
+Usage:
+    python -m benchmarks.bench_predict_path --iterations 2000
+"""
+
+import argparse
+import pickle
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from src.fast_inference import (
+    ForestPredictor,
+    InlineScaler,
+    RowBuffers,
+    parse_form_row,
+)
+from src.feature_transformer import (
+    CATEGORICAL_FEATURES,
+    FEATURE_NAMES,
+    FeatureTransformer,
+)
+from config.paths_config import MODEL_PATH, TRAIN_PATH
+
+SAMPLE_FORM = {
+    "Age": "22",
+    "Fare": "7.25",
+    "Pclass": "3",
+    "Sex": "0",
+    "Embarked": "2",
+    "Familysize": "2",
+    "Isalone": "0",
+    "HasCabin": "0",
+    "Title": "0",
+    "Pclass_Fare": "21.75",
+    "Age_Fare": "159.5",
+}
+
+
+def _timed(stages, name, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+
+def run_baseline(model, scaler, detector, form, stages):
+    """The pre-fast-path /predict body, stage by stage."""
+
+    def parse():
+        return pd.DataFrame(
+            [[float(form[name]) for name in FEATURE_NAMES]], columns=FEATURE_NAMES
+        )
+
+    features = _timed(stages, "parse", parse)
+    scaled = _timed(stages, "scale", scaler.transform, features)
+    if detector is not None:
+        _timed(stages, "drift", detector.predict, scaled)
+    return _timed(stages, "inference", model.predict, features)[0]
+
+
+def run_fast_path(predictor, fast_scaler, buffers, detector, form, stages):
+    """The current /predict body, stage by stage."""
+    features = _timed(stages, "parse", parse_form_row, form, FEATURE_NAMES, buffers.raw)
+    scaled = _timed(
+        stages, "scale", fast_scaler.transform, features, out=buffers.scaled
+    )
+    if detector is not None:
+        _timed(stages, "drift", detector.predict, scaled)
+    return _timed(stages, "inference", predictor.predict, features)[0]
+
+
+def summarize(stages):
+    summary = {}
+    for name, samples in stages.items():
+        micros = np.asarray(samples) * 1e6
+        summary[name] = {
+            "p50_us": float(np.percentile(micros, 50)),
+            "p95_us": float(np.percentile(micros, 95)),
+        }
+    total = np.sum([np.asarray(s) for s in stages.values()], axis=0) * 1e6
+    summary["total"] = {
+        "p50_us": float(np.percentile(total, 50)),
+        "p95_us": float(np.percentile(total, 95)),
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument(
+        "--with-drift",
+        action="store_true",
+        help="Include the drift detection stage (identical in both paths)",
+    )
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    with open(MODEL_PATH, "rb") as model_file:
+        model = pickle.load(model_file)
+
+    raw = pd.read_csv(TRAIN_PATH)
+    reference = pd.DataFrame(
+        FeatureTransformer().fit(raw).transform_array(raw), columns=FEATURE_NAMES
+    )
+    scaler = StandardScaler().fit(reference)
+
+    detector = None
+    if args.with_drift:
+        from src.drift import DriftDetector
+
+        detector = DriftDetector(
+            scaler.transform(reference),
+            p_val=0.05,
+            categorical=[FEATURE_NAMES.index(c) for c in CATEGORICAL_FEATURES],
+        )
+
+    predictor = ForestPredictor(model)
+    fast_scaler = InlineScaler.from_standard_scaler(scaler)
+    buffers = RowBuffers(len(FEATURE_NAMES))
+
+    results = {}
+    for label, run in (
+        ("baseline", lambda s: run_baseline(model, scaler, detector, SAMPLE_FORM, s)),
+        (
+            "fast_path",
+            lambda s: run_fast_path(
+                predictor, fast_scaler, buffers, detector, SAMPLE_FORM, s
+            ),
+        ),
+    ):
+        for _ in range(args.warmup):
+            run({})
+        stages = {}
+        predictions = {run(stages) for _ in range(args.iterations)}
+        results[label] = (summarize(stages), predictions)
+
+    assert results["baseline"][1] == results["fast_path"][1], "Predictions differ"
+
+    print(f"{'stage':<12}{'baseline p50':>14}{'fast p50':>12}{'speedup':>10}")
+    for stage, baseline in results["baseline"][0].items():
+        fast = results["fast_path"][0][stage]
+        print(
+            f"{stage:<12}{baseline['p50_us']:>12.1f}us{fast['p50_us']:>10.1f}us"
+            f"{baseline['p50_us'] / fast['p50_us']:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
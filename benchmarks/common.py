@@ -0,0 +1,131 @@
+"""Shared helpers for the benchmark scripts: local Redis, seeding and results."""
+
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_redis(port=None):
+    """Start an in-process fakeredis TCP server and return its redis:// URL."""
+    from fakeredis import TcpFakeServer
+
+    port = port or free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0", server
+
+
+def spawn_fake_redis(port=None):
+    """
+    Run a fakeredis TCP server in a child process and return (url, process).
+
+    Keeps the stand-in's CPU and memory out of the measured process.
+    """
+    port = port or free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.common", "--serve-redis", str(port)]
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return f"redis://127.0.0.1:{port}/0", process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("fakeredis server did not start")
+
+
+def engineered_features(raw_df, transformer):
+    """Raw passenger rows -> {PassengerId: feature dict} as DataProcessing stores."""
+    from src.feature_transformer import FEATURE_NAMES
+
+    return (
+        transformer.transform(raw_df)
+        .set_index("PassengerId")[FEATURE_NAMES + ["Survived"]]
+        .to_dict(orient="index")
+    )
+
+
+def rss_mb(pid):
+    """Resident set size of a process (Linux /proc), in MiB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def tree_rss_mb(pid):
+    """RSS of a process plus its direct children (e.g. gunicorn master + workers)."""
+    values = [rss_mb(p) for p in [pid] + child_pids(pid)]
+    values = [v for v in values if v is not None]
+    return sum(values) if values else None
+
+
+def git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latency_summary(latencies):
+    """p50/p95/p99 (milliseconds) of a list of latencies in seconds."""
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def write_results(name, results, output=None):
+    """Write results as JSON (default benchmarks/results/<name>-<commit>.json)."""
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        **results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{results['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    return output
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve-redis"]:
+        _, redis_server = start_fake_redis(int(sys.argv[2]))
+        threading.Event().wait()
@@ -0,0 +1,159 @@
+"""
+Drift detection benchmark: src.drift vs alibi-detect.
+
+Each engine runs in a fresh child process that has only imported numpy, so
+the import time and the RSS it adds are what a serving worker pays at
+startup. Predict latency is the median over repeated calls for single rows
+and small batches drawn from the reference data. Requires alibi-detect
+(requirements-dev.txt) for the baseline engines.
+
+Usage:
+    python -m benchmarks.drift_benchmark
+    python -m benchmarks.drift_benchmark --iterations 500 --batch-sizes 1 32 256
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+import numpy as np
+from benchmarks.common import rss_mb, write_results
+from config.paths_config import TRAIN_PATH
+
+ENGINES = ("drift", "drift-tabular", "alibi-ks", "alibi-tabular")
+
+
+def reference_data():
+    """Scaled engineered features of the training CSV, as the app's reference."""
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+    from src.feature_transformer import FeatureTransformer
+
+    raw = pd.read_csv(TRAIN_PATH)
+    features = FeatureTransformer().fit(raw).transform_array(raw)
+    return StandardScaler().fit_transform(features)
+
+
+def child(engine, reference_path, iterations, batch_sizes):
+    """Runs in the child process: print one JSON measurement."""
+    warnings.simplefilter("ignore")
+    reference = np.load(reference_path)
+    from src.feature_transformer import CATEGORICAL_FEATURES, FEATURE_NAMES
+
+    categorical = [FEATURE_NAMES.index(c) for c in CATEGORICAL_FEATURES]
+    rss_start = rss_mb(os.getpid())
+    start = time.perf_counter()
+    if engine.startswith("drift"):
+        from src.drift import DriftDetector
+
+        import_s = time.perf_counter() - start
+        detector = DriftDetector(
+            reference,
+            p_val=0.05,
+            categorical=categorical if engine == "drift-tabular" else (),
+        )
+    else:
+        from alibi_detect.cd import KSDrift, TabularDrift
+
+        import_s = time.perf_counter() - start
+        if engine == "alibi-ks":
+            detector = KSDrift(reference, p_val=0.05)
+        else:
+            detector = TabularDrift(
+                reference,
+                p_val=0.05,
+                categories_per_feature={f: None for f in categorical},
+            )
+    init_s = time.perf_counter() - start - import_s
+
+    rng = np.random.default_rng(0)
+    latency_us = {}
+    for batch_size in batch_sizes:
+        timings = []
+        for _ in range(iterations):
+            x = reference[rng.integers(0, len(reference), batch_size)]
+            start = time.perf_counter()
+            detector.predict(x)
+            timings.append(time.perf_counter() - start)
+        latency_us[str(batch_size)] = statistics.median(timings) * 1e6
+
+    print(
+        json.dumps(
+            {
+                "import_ms": import_s * 1000,
+                "init_ms": init_s * 1000,
+                "rss_added_mb": rss_mb(os.getpid()) - rss_start,
+                "predict_us": latency_us,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--output", help="Results JSON path")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(*args.child, args.iterations, args.batch_sizes)
+
+    warnings.simplefilter("ignore")
+    reference_path = os.path.join(os.path.dirname(__file__), ".drift_reference.npy")
+    np.save(reference_path, reference_data())
+    results = {}
+    try:
+        header = f"{'engine':<14} {'import ms':>10} {'init ms':>8} {'RSS MiB':>8}"
+        print(header + "".join(f" {f'{n} rows us':>12}" for n in args.batch_sizes))
+        for engine in args.engines:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    __spec__.name,
+                    "--child",
+                    engine,
+                    reference_path,
+                    "--iterations",
+                    str(args.iterations),
+                    "--batch-sizes",
+                    *map(str, args.batch_sizes),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[engine] = r = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{engine:<14} {r['import_ms']:>10.1f} {r['init_ms']:>8.1f} "
+                f"{r['rss_added_mb']:>8.1f}"
+                + "".join(
+                    f" {r['predict_us'][str(n)]:>12.1f}" for n in args.batch_sizes
+                )
+            )
+    finally:
+        os.remove(reference_path)
+
+    output = write_results(
+        "drift",
+        {
+            "config": {
+                "iterations": args.iterations,
+                "batch_sizes": args.batch_sizes,
+            },
+            "engines": results,
+        },
+        args.output,
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
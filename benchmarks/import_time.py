@@ -0,0 +1,134 @@
+"""
+App startup benchmark: import-time profile and time to healthy / ready.
+
+`python -X importtime -c "import app"` runs in a fresh process and its report
+is summarized as the total import time plus the most expensive top-level
+packages (self time summed over their submodules). The import is profiled
+with WARMUP_ON_IMPORT=0: the warm-up thread imports modules concurrently,
+which `-X importtime` cannot attribute correctly. Then the app is started
+under gunicorn (one worker) against a seeded fakeredis, and /healthz and
+/readyz are polled to time how long a cold worker takes to answer each: the
+latency an autoscaler sees before a new instance can take traffic.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 5 --top 15
+"""
+
+import argparse
+import collections
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.common import free_port, spawn_fake_redis, write_results
+from benchmarks.serving_load import seed_redis, start_server
+
+
+def import_profile(module, env):
+    """Parse `-X importtime` output into (total_us, {package: self_us})."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+    by_package = collections.Counter()
+    total_us = None
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total_us = int(cumulative_us)
+    return total_us, by_package
+
+
+def time_to_status(port, paths, timeout=120):
+    """Seconds until each path first answers 200, polling every 20 ms."""
+    start = time.monotonic()
+    pending, reached = list(paths), {}
+    while pending and time.monotonic() - start < timeout:
+        for path in list(pending):
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", path)
+                if conn.getresponse().status == 200:
+                    reached[path] = time.monotonic() - start
+                    pending.remove(path)
+            except OSError:
+                pass
+        time.sleep(0.02)
+    if pending:
+        raise RuntimeError(f"{pending} did not return 200 within {timeout}s")
+    return reached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Packages to list")
+    parser.add_argument("--output", help="Results JSON path")
+    args = parser.parse_args()
+
+    redis_url, redis_process = spawn_fake_redis()
+    env = dict(os.environ, REDIS_URL=redis_url, MODEL_RELOAD_INTERVAL="0")
+    try:
+        seed_redis(redis_url)
+
+        # The import alone; the warm-up is timed by the cold starts below
+        import_env = dict(env, WARMUP_ON_IMPORT="0")
+        profiles = [import_profile(args.module, import_env) for _ in range(args.repeat)]
+        import_ms = statistics.median(total for total, _ in profiles) / 1000
+        packages = {
+            package: statistics.median(p.get(package, 0) for _, p in profiles) / 1000
+            for package in profiles[0][1]
+        }
+        top = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        print(f"import {args.module}: {import_ms:.1f} ms")
+        for package, ms in top:
+            print(f"  {package:<28} {ms:>8.1f} ms")
+
+        startups = []
+        for _ in range(args.repeat):
+            port = free_port()
+            server = start_server(port, redis_url, workers=1, threads=1)
+            try:
+                startups.append(time_to_status(port, ["/healthz", "/readyz"]))
+            finally:
+                server.terminate()
+                server.wait()
+        startup = {
+            path: statistics.median(run[path] for run in startups)
+            for path in startups[0]
+        }
+        print(
+            f"gunicorn cold start: /healthz {startup['/healthz']:.2f}s, "
+            f"/readyz {startup['/readyz']:.2f}s"
+        )
+    finally:
+        redis_process.terminate()
+
+    output = write_results(
+        "import_time",
+        {
+            "config": {"module": args.module, "repeat": args.repeat},
+            "import_ms": import_ms,
+            "top_packages_ms": dict(top),
+            "time_to_healthz_s": startup["/healthz"],
+            "time_to_readyz_s": startup["/readyz"],
+        },
+        args.output,
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Model artifact load benchmark: pickle vs joblib (mmap) vs the flat format.
+
+Each format is loaded in a fresh child process that has already imported
+numpy and sklearn, so the numbers isolate the artifact itself: wall time to
+load, RSS added by loading, and the first single-row prediction (which is
+when memory-mapped pages are actually touched). Memory-mapped pages count
+towards RSS but are page cache shared by every worker, so anonymous
+(per-worker heap) memory is reported separately.
+
+Usage:
+    python -m benchmarks.model_load_benchmark
+    python -m benchmarks.model_load_benchmark --trees 300 --rows 100000
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+from benchmarks.common import rss_mb, write_results
+from config.paths_config import MODEL_PATH
+
+FORMATS = ("pickle", "joblib", "joblib-mmap", "flat", "flat-mmap")
+
+
+def anonymous_mb():
+    """Anonymous (heap, not file-backed) memory of this process, in MiB."""
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load(fmt, path):
+    from src.model_format import FlatForest, load_joblib
+
+    if fmt == "pickle":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    if fmt.startswith("joblib"):
+        return load_joblib(path, mmap=fmt == "joblib-mmap")
+    return FlatForest.load(path, mmap=fmt == "flat-mmap")
+
+
+def child(fmt, path):
+    """Runs in the child process: print one JSON measurement."""
+    import sklearn.ensemble  # noqa: F401 (loaded by every format's consumer)
+    from src.fast_inference import ForestPredictor
+
+    warnings.simplefilter("ignore")
+    rss_start, anon_start = rss_mb(os.getpid()), anonymous_mb()
+    start = time.perf_counter()
+    model = load(fmt, path)
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb(os.getpid())
+
+    row = np.zeros((1, model.n_features_in_))
+    predictor = ForestPredictor(model)
+    start = time.perf_counter()
+    predictor.predict_proba(row)
+    first_predict_s = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "load_ms": load_s * 1000,
+                "first_predict_ms": first_predict_s * 1000,
+                "rss_load_mb": rss_loaded - rss_start,
+                "rss_after_predict_mb": rss_mb(os.getpid()) - rss_start,
+                "anon_after_predict_mb": anonymous_mb() - anon_start,
+            }
+        )
+    )
+
+
+def synthetic_forest(n_trees, n_rows, seed=42):
+    """A deeper, larger forest than the Titanic model, on synthetic data."""
+    from sklearn.ensemble import RandomForestClassifier
+    from benchmarks.synthetic_data import generate_passengers
+    from src.feature_transformer import FEATURE_NAMES, FeatureTransformer
+
+    raw = generate_passengers(n_rows, seed=seed)
+    X = FeatureTransformer().fit_transform(raw)[FEATURE_NAMES]
+    return RandomForestClassifier(
+        n_estimators=n_trees, random_state=seed, n_jobs=-1
+    ).fit(X, raw["Survived"])
+
+
+def write_artifacts(model, workdir):
+    from src.model_format import save_forest, save_joblib
+
+    paths = {"pickle": os.path.join(workdir, "model.pkl")}
+    with open(paths["pickle"], "wb") as f:
+        pickle.dump(model, f)
+    paths["joblib"] = paths["joblib-mmap"] = os.path.join(workdir, "model.joblib")
+    save_joblib(model, paths["joblib"])
+    paths["flat"] = paths["flat-mmap"] = os.path.join(workdir, "model.forest")
+    save_forest(model, paths["flat"])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=MODEL_PATH, help="Pickled forest")
+    parser.add_argument(
+        "--trees", type=int, help="Benchmark a synthetic forest with N trees instead"
+    )
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Results JSON path")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(*args.child)
+
+    warnings.simplefilter("ignore")
+    if args.trees:
+        model = synthetic_forest(args.trees, args.rows)
+    else:
+        with open(args.model, "rb") as f:
+            model = pickle.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="model_load_bench_")
+    try:
+        paths = write_artifacts(model, workdir)
+        sizes = {fmt: os.path.getsize(path) / 2**20 for fmt, path in paths.items()}
+
+        results = {}
+        print(
+            f"{'format':<12} {'size MiB':>9} {'load ms':>9} {'1st pred ms':>12} "
+            f"{'RSS load':>9} {'RSS pred':>9} {'anon':>9}"
+        )
+        for fmt in FORMATS:
+            runs = [
+                json.loads(
+                    subprocess.run(
+                        [
+                            sys.executable,
+                            "-m",
+                            __spec__.name,
+                            "--child",
+                            fmt,
+                            paths[fmt],
+                        ],
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    ).stdout
+                )
+                for _ in range(args.repeat)
+            ]
+            results[fmt] = {
+                key: statistics.median(run[key] for run in runs) for key in runs[0]
+            }
+            results[fmt]["size_mb"] = sizes[fmt]
+            r = results[fmt]
+            print(
+                f"{fmt:<12} {r['size_mb']:>9.2f} {r['load_ms']:>9.1f} "
+                f"{r['first_predict_ms']:>12.2f} {r['rss_load_mb']:>9.1f} "
+                f"{r['rss_after_predict_mb']:>9.1f} "
+                f"{r['anon_after_predict_mb']:>9.1f}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = write_results(
+        "model_load",
+        {
+            "config": {
+                "model": None if args.trees else args.model,
+                "trees": len(model.estimators_),
+                "rows": args.rows if args.trees else None,
+                "repeat": args.repeat,
+            },
+            "formats": results,
+        },
+        args.output,
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Offline pipeline benchmark with synthetic data scaling.
+
+Generates synthetic passenger tables (10^4 rows and up) and runs the real
+DataIngestion, DataProcessing and ModelTraining stages against local
+stand-ins: an SQLite database attached as the `public` schema in place of
+Postgres, and a fakeredis server in a child process in place of Redis.
+Each stage records wall time, peak RSS and rows/s so scaling curves can be
+compared across commits.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --sizes 10000 100000
+    python -m benchmarks.pipeline_benchmark --sizes 1000000 --stages ingestion processing
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import warnings
+from benchmarks.common import rss_mb, spawn_fake_redis, write_results
+from benchmarks.synthetic_data import generate_passengers
+from src.data_ingestion import DataIngestion
+from src.data_processing import DataProcessing
+from src.model_training import ModelTraining
+
+STAGES = ("ingestion", "processing", "training")
+
+
+class LocalDataIngestion(DataIngestion):
+    """DataIngestion reading `public.titanic` from an SQLite file."""
+
+    def connect_to_db(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("ATTACH DATABASE ? AS public", (self.db_params["path"],))
+        return conn
+
+
+class PeakRSSMonitor:
+    """Samples this process's RSS in a background thread and keeps the peak."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb(os.getpid()) or 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb(os.getpid()) or 0.0)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb(os.getpid()) or 0.0)
+
+
+def measure(stage, n_rows, func):
+    with PeakRSSMonitor() as monitor:
+        start = time.perf_counter()
+        func()
+        wall = time.perf_counter() - start
+    result = {
+        "wall_s": wall,
+        "rows_per_s": n_rows / wall if wall else None,
+        "peak_rss_mb": monitor.peak,
+        "rss_growth_mb": monitor.peak - monitor.start,
+    }
+    print(
+        f"  {stage:<11} {wall:>9.2f}s {result['rows_per_s']:>12,.0f} rows/s "
+        f"peak RSS {monitor.peak:>8.1f} MiB (+{result['rss_growth_mb']:.1f})"
+    )
+    return result
+
+
+def run_size(n_rows, stages, workdir, seed):
+    from src.feature_store import RedisFeatureStore
+
+    # === Source table in the Postgres stand-in ===
+    source_db = os.path.join(workdir, "source.db")
+    with sqlite3.connect(source_db) as conn:
+        generate_passengers(n_rows, seed=seed).to_sql(
+            "titanic", conn, index=False, if_exists="replace"
+        )
+
+    raw_dir = os.path.join(workdir, "raw")
+    model_dir = os.path.join(workdir, "models") + os.sep
+    ingestion = LocalDataIngestion({"path": source_db}, raw_dir)
+
+    feature_store = RedisFeatureStore()
+    feature_store.client.flushdb()
+
+    results = {}
+    print(f"{n_rows:,} rows")
+    if "ingestion" in stages:
+        results["ingestion"] = measure("ingestion", n_rows, ingestion.run)
+    if "processing" in stages:
+        processing = DataProcessing(
+            ingestion.train_path,
+            ingestion.test_path,
+            feature_store,
+            transformer_path=os.path.join(workdir, "feature_transformer.json"),
+            processed_path=os.path.join(workdir, "features.parquet"),
+        )
+        results["processing"] = measure("processing", n_rows, processing.run)
+    if "training" in stages:
+        training = ModelTraining(feature_store, model_save_path=model_dir)
+        results["training"] = measure("training", n_rows, training.run)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Dataset sizes to run (up to 10^7 rows)",
+    )
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--redis-url", help="Use this Redis instead of a spawned fakeredis"
+    )
+    parser.add_argument("--output", help="Results JSON path")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    redis_process = None
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    else:
+        os.environ["REDIS_URL"], redis_process = spawn_fake_redis()
+
+    runs = {}
+    try:
+        for n_rows in args.sizes:
+            workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+            try:
+                runs[str(n_rows)] = run_size(n_rows, args.stages, workdir, args.seed)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        if redis_process is not None:
+            redis_process.terminate()
+
+    output = write_results(
+        "pipeline",
+        {"config": {"stages": args.stages, "seed": args.seed}, "sizes": runs},
+        args.output,
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
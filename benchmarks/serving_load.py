@@ -0,0 +1,286 @@
+"""
+Serving load test and regression check for the Flask app.
+
+Starts a local Redis stand-in (fakeredis) seeded with the training features,
+runs the app under gunicorn, drives /predict, /api/predict and batch
+/api/predict requests at a configurable concurrency, and reports throughput,
+p50/p95/p99 latency and server RSS. Results are written as JSON so they can
+be compared across commits; `--baseline` fails the run on regressions,
+including a higher rate of failed requests.
+
+Usage:
+    python -m benchmarks.serving_load --concurrency 8 --duration 20
+    python -m benchmarks.serving_load --baseline benchmarks/results/serving-abc123.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import pandas as pd
+from benchmarks.common import (
+    engineered_features,
+    free_port,
+    latency_summary,
+    start_fake_redis,
+    tree_rss_mb,
+    write_results,
+)
+from config.paths_config import TEST_PATH, TRAIN_PATH, TRANSFORMER_PATH
+
+SAMPLE_FORM = {
+    "Age": "22",
+    "Fare": "7.25",
+    "Pclass": "3",
+    "Sex": "0",
+    "Embarked": "2",
+    "Familysize": "2",
+    "Isalone": "0",
+    "HasCabin": "0",
+    "Title": "0",
+    "Pclass_Fare": "21.75",
+    "Age_Fare": "159.5",
+}
+
+# Relative change allowed before a metric counts as a regression
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "p99_ms")
+LOWER_IS_WORSE = ("throughput_rps",)
+
+
+def seed_redis(redis_url):
+    from src.feature_store import RedisFeatureStore
+    from src.feature_transformer import FeatureTransformer
+
+    os.environ["REDIS_URL"] = redis_url
+    transformer = FeatureTransformer.load(TRANSFORMER_PATH)
+    RedisFeatureStore().store_batch_features(
+        engineered_features(pd.read_csv(TRAIN_PATH), transformer)
+    )
+
+
+def raw_records():
+    df = pd.read_csv(TEST_PATH).drop(columns=["Survived"], errors="ignore")
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def build_scenarios(batch_size):
+    records = raw_records()
+    batch = (records * (batch_size // len(records) + 1))[:batch_size]
+    form = urllib.parse.urlencode(SAMPLE_FORM)
+    return {
+        "predict": (
+            "/predict",
+            form,
+            {"Content-Type": "application/x-www-form-urlencoded"},
+        ),
+        "api_predict": (
+            "/api/predict",
+            json.dumps(records[0]),
+            {"Content-Type": "application/json"},
+        ),
+        f"api_batch_{batch_size}": (
+            "/api/predict",
+            json.dumps(batch),
+            {"Content-Type": "application/json"},
+        ),
+    }
+
+
+def start_server(port, redis_url, workers, threads):
+    env = dict(
+        os.environ,
+        REDIS_URL=redis_url,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="prom_bench_"),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_up(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server on port {port} did not come up in {timeout}s")
+
+
+def drive(port, path, body, headers, concurrency, duration):
+    """Send requests from `concurrency` threads for `duration` seconds."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local_latencies, local_errors = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                ok = response.status == 200 and b'"error"' not in payload
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                local_latencies.append(time.perf_counter() - start)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    sent = len(latencies) + errors[0]
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "error_rate": errors[0] / sent if sent else 0.0,
+        "throughput_rps": len(latencies) / elapsed,
+        **latency_summary(latencies),
+    }
+
+
+def error_rate(scenario):
+    # Results written before error_rate was recorded only have the counts
+    if "error_rate" in scenario:
+        return scenario["error_rate"]
+    sent = scenario.get("requests", 0) + scenario.get("errors", 0)
+    return scenario.get("errors", 0) / sent if sent else 0.0
+
+
+def format_ms(value):
+    """Latencies are None when every request in a scenario failed."""
+    return "n/a" if value is None else f"{value:.2f}ms"
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of human-readable regressions against a baseline run."""
+    regressions = []
+    checks = [(name, HIGHER_IS_WORSE, LOWER_IS_WORSE) for name in results["scenarios"]]
+    for scenario, worse_up, worse_down in checks:
+        current = results["scenarios"][scenario]
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            if current["errors"]:
+                regressions.append(f"{scenario}.errors: {current['errors']} (new)")
+            continue
+        # Any rise in failures is a regression, whatever the latencies
+        old_rate, new_rate = error_rate(previous), error_rate(current)
+        if new_rate > old_rate:
+            regressions.append(
+                f"{scenario}.error_rate: {old_rate:.2%} -> {new_rate:.2%} "
+                f"({current['errors']} errors)"
+            )
+        for metric in worse_up + worse_down:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (metric in worse_up and change > max_regression) or (
+                metric in worse_down and -change > max_regression
+            ):
+                regressions.append(
+                    f"{scenario}.{metric}: {old:.2f} -> {new:.2f} ({change:+.1%})"
+                )
+
+    old_rss, new_rss = baseline.get("server_rss_mb"), results.get("server_rss_mb")
+    if old_rss and new_rss and (new_rss - old_rss) / old_rss > max_regression:
+        regressions.append(f"server_rss_mb: {old_rss:.1f} -> {new_rss:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--redis-url", help="Use this Redis instead of an embedded fakeredis"
+    )
+    parser.add_argument("--output", help="Results JSON path")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    redis_url = args.redis_url or start_fake_redis()[0]
+    seed_redis(redis_url)
+
+    port = free_port()
+    server = start_server(port, redis_url, args.workers, args.threads)
+    try:
+        wait_until_up(port)
+        scenarios = {}
+        for name, (path, body, headers) in build_scenarios(args.batch_size).items():
+            drive(port, path, body, headers, 1, 1.0)  # warm-up
+            scenarios[name] = drive(
+                port, path, body, headers, args.concurrency, args.duration
+            )
+            print(
+                f"{name:<16} {scenarios[name]['throughput_rps']:>8.1f} req/s  "
+                f"p50 {format_ms(scenarios[name]['p50_ms'])}  "
+                f"p95 {format_ms(scenarios[name]['p95_ms'])}  "
+                f"p99 {format_ms(scenarios[name]['p99_ms'])}  "
+                f"errors {scenarios[name]['errors']}"
+            )
+        server_rss = tree_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results = {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers,
+            "threads": args.threads,
+            "batch_size": args.batch_size,
+        },
+        "server_rss_mb": server_rss,
+        "scenarios": scenarios,
+    }
+    print(f"server RSS: {server_rss:.1f} MiB" if server_rss else "server RSS: n/a")
+    print(f"Results written to {write_results('serving', results, args.output)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("Performance regressions detected:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Synthetic passenger datasets with the raw Titanic schema.
+
+Column distributions (class mix, sex ratio, age by class, fare by class,
+family sizes, cabin and port frequencies, title usage and survival odds)
+follow the 891-row Titanic data, so the generated frames exercise the same
+code paths (missing values, regex title extraction, SMOTE) at any size.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "PassengerId",
+    "Survived",
+    "Pclass",
+    "Name",
+    "Sex",
+    "Age",
+    "SibSp",
+    "Parch",
+    "Ticket",
+    "Fare",
+    "Cabin",
+    "Embarked",
+]
+
+SURNAMES = np.array(
+    [
+        "Andersson",
+        "Sage",
+        "Johnson",
+        "Goodwin",
+        "Carter",
+        "Skoog",
+        "Brown",
+        "Smith",
+        "Williams",
+        "Kelly",
+        "Baclini",
+        "Fortune",
+        "Harper",
+        "Asplund",
+        "Panula",
+        "Rice",
+    ],
+    dtype=object,
+)
+FIRST_NAMES = np.array(
+    ["John", "William", "Mary", "Anna", "Thomas", "Elizabeth", "Karl", "Margaret"],
+    dtype=object,
+)
+RARE_TITLES = np.array(["Dr", "Rev", "Col", "Major", "Mlle", "Countess"], dtype=object)
+CABIN_DECKS = np.array(list("ABCDEFG"), dtype=object)
+
+
+def generate_passengers(n_rows, seed=42):
+    """Generate `n_rows` raw passenger records as a DataFrame."""
+    rng = np.random.default_rng(seed)
+
+    pclass = rng.choice([1, 2, 3], size=n_rows, p=[0.24, 0.21, 0.55])
+    female = rng.random(n_rows) < 0.35
+
+    # Older passengers travel in the higher classes
+    age_mean = np.select([pclass == 1, pclass == 2], [38.0, 30.0], 25.0)
+    age = np.clip(rng.normal(age_mean, 14.0), 0.42, 80.0).round(1)
+
+    sibsp = rng.choice(
+        [0, 1, 2, 3, 4, 5, 8],
+        size=n_rows,
+        p=[0.68, 0.235, 0.03, 0.02, 0.02, 0.005, 0.01],
+    )
+    parch = rng.choice(
+        [0, 1, 2, 3, 4, 5, 6],
+        size=n_rows,
+        p=[0.76, 0.13, 0.09, 0.006, 0.005, 0.006, 0.003],
+    )
+
+    fare_median = np.select([pclass == 1, pclass == 2], [60.0, 14.25], 8.05)
+    fare = (fare_median * rng.lognormal(0.0, 0.55, n_rows)).round(4)
+
+    # Titles follow sex and age; ~2% rare titles map to the "Rare" code
+    title = np.where(
+        female,
+        np.where((age < 18) | (rng.random(n_rows) < 0.45), "Miss", "Mrs"),
+        np.where(age < 13, "Master", "Mr"),
+    ).astype(object)
+    rare = rng.random(n_rows) < 0.02
+    title[rare] = rng.choice(RARE_TITLES, size=rare.sum())
+    name = (
+        SURNAMES[rng.integers(0, len(SURNAMES), n_rows)]
+        + ", "
+        + title
+        + ". "
+        + FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), n_rows)]
+    )
+
+    has_cabin = rng.random(n_rows) < np.select(
+        [pclass == 1, pclass == 2], [0.81, 0.09], 0.02
+    )
+    cabin = np.where(
+        has_cabin,
+        CABIN_DECKS[rng.integers(0, len(CABIN_DECKS), n_rows)]
+        + rng.integers(1, 130, n_rows).astype(str).astype(object),
+        None,
+    )
+
+    embarked = rng.choice(
+        np.array(["S", "C", "Q"], dtype=object), size=n_rows, p=[0.725, 0.19, 0.085]
+    )
+
+    # Survival odds: women, children and upper classes first
+    logit = -0.6 + 2.6 * female - 0.9 * (pclass - 1) - 0.015 * (age - 30)
+    survived = (rng.random(n_rows) < 1.0 / (1.0 + np.exp(-logit))).astype(int)
+
+    df = pd.DataFrame(
+        {
+            "PassengerId": np.arange(1, n_rows + 1),
+            "Survived": survived,
+            "Pclass": pclass,
+            "Name": name,
+            "Sex": np.where(female, "female", "male"),
+            "Age": age,
+            "SibSp": sibsp,
+            "Parch": parch,
+            "Ticket": rng.integers(1000, 400000, n_rows).astype(str),
+            "Fare": fare,
+            "Cabin": cabin,
+            "Embarked": embarked,
+        },
+        columns=COLUMNS,
+    )
+
+    # Missing values at the rates seen in the real data
+    df.loc[rng.random(n_rows) < 0.20, "Age"] = np.nan
+    df.loc[rng.random(n_rows) < 0.002, "Embarked"] = None
+    return df
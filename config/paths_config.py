@@ -1,8 +1,36 @@
 import os
 
+# Airflow tasks of one run may execute on different workers and working
+# directories, so the training DAG resolves its artifacts under one absolute
+# root: PIPELINE_ARTIFACTS_ROOT (a volume shared by every worker), defaulting
+# to artifacts/ in the project directory. Models live under the same root, so
+# serving reads (and hot-reloads) what the DAG registers
+PIPELINE_ARTIFACTS_ROOT = os.path.abspath(
+    os.getenv(
+        "PIPELINE_ARTIFACTS_ROOT",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts"),
+    )
+)
+PIPELINE_RUNS_DIR = os.path.join(PIPELINE_ARTIFACTS_ROOT, "runs")
+
+
 RAW_DIR = "artifacts/raw"
 TRAIN_PATH = os.path.join(RAW_DIR, "titanic_train.csv")
 TEST_PATH = os.path.join(RAW_DIR, "titanic_test.csv")
 
 
 PROCESSED_DIR = "artifacts/processed"
+PROCESSED_FEATURES_PATH = os.path.join(PROCESSED_DIR, "features.parquet")
+
+
+MODEL_DIR = os.path.join(PIPELINE_ARTIFACTS_ROOT, "models")
+MODEL_PATH = os.path.join(MODEL_DIR, "random_forest_model.pkl")
+FLAT_MODEL_PATH = os.path.join(MODEL_DIR, "random_forest_model.forest")
+TRANSFORMER_PATH = os.path.join(MODEL_DIR, "feature_transformer.json")
+MODEL_REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")
+
+
+FEATURE_STORE_DIR = "artifacts/feature_store"
+
+
+PREDICTIONS_DIR = "artifacts/predictions"
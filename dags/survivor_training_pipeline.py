@@ -0,0 +1,161 @@
+"""
+## SurviverFlow training pipeline
+
+Runs `DataIngestion`, `DataProcessing` and `ModelTraining` as separate tasks
+that hand each other artifact paths (CSV, Parquet, pickles) rather than
+in-memory state:
+
+    ingest -> process -> store_features                       (Redis)
+                      -> train_candidate x N -> register_best  (Parquet)
+
+Writing features to Redis and training run concurrently, since training
+reads the processed Parquet artifact. Hyperparameter candidates are sampled
+from the same search space as `ModelTraining.hyperparamter_tuning` and fanned
+out as dynamically mapped tasks; the candidate with the best 3-fold CV
+accuracy is registered as the new model version, together with the
+FeatureTransformer fitted by the same run.
+
+Each run writes its artifacts under `<PIPELINE_ARTIFACTS_ROOT>/runs/<logical
+date>/`, an absolute path that must be shared by every Airflow worker.
+"""
+
+import os
+from airflow.decorators import dag, task
+from pendulum import datetime
+
+N_CANDIDATES = 10
+
+
+@dag(
+    start_date=datetime(2024, 1, 1),
+    schedule=None,
+    catchup=False,
+    doc_md=__doc__,
+    default_args={"owner": "SurviverFlow", "retries": 2},
+    max_active_tasks=8,
+    tags=["training", "survivorflow"],
+)
+def survivor_training_pipeline():
+    # Heavy imports live inside the tasks to keep DAG parsing fast
+
+    @task
+    def ingest(**context) -> dict:
+        from config.database_config import DB_CONFIG
+        from config.paths_config import PIPELINE_RUNS_DIR
+        from src.data_ingestion import DataIngestion
+
+        run_dir = os.path.join(PIPELINE_RUNS_DIR, context["ts_nodash"])
+        ingestion = DataIngestion(DB_CONFIG, os.path.join(run_dir, "raw"))
+        ingestion.run()
+        return {
+            "run_dir": run_dir,
+            "train_path": ingestion.train_path,
+            "test_path": ingestion.test_path,
+        }
+
+    @task
+    def process(raw: dict) -> dict:
+        from src.data_processing import DataProcessing
+
+        run_dir = raw["run_dir"]
+        processing = DataProcessing(
+            raw["train_path"],
+            raw["test_path"],
+            feature_store=None,  # Stored by store_features, in parallel
+            transformer_path=os.path.join(run_dir, "feature_transformer.json"),
+            processed_path=os.path.join(run_dir, "processed", "features.parquet"),
+        )
+        processing.load_data()
+        processing.preprocess_data()
+        processing.handle_imbalance_data()
+        processing.save_transformer()
+        processing.save_processed_data()
+        return {
+            "run_dir": run_dir,
+            "features_path": processing.processed_path,
+            "transformer_path": processing.transformer_path,
+        }
+
+    @task
+    def store_features(processed: dict) -> int:
+        import pandas as pd
+        from src.feature_store import get_feature_store
+
+        batch_data = (
+            pd.read_parquet(processed["features_path"])
+            .set_index("PassengerId")
+            .to_dict(orient="index")
+        )
+        # Inline GC: a daemon thread would die with the task process
+        return get_feature_store(background_gc=False).store_batch_features(batch_data)
+
+    @task
+    def candidate_params() -> list[dict]:
+        from sklearn.model_selection import ParameterSampler
+        from src.model_training import PARAM_DISTRIBUTIONS
+
+        return list(
+            ParameterSampler(PARAM_DISTRIBUTIONS, n_iter=N_CANDIDATES, random_state=42)
+        )
+
+    @task
+    def train_candidate(processed: dict, params: dict) -> dict:
+        import pickle
+        from src.model_format import atomic_write
+        from src.model_training import ModelTraining
+
+        training = ModelTraining(
+            feature_store=None,
+            model_save_path=os.path.join(processed["run_dir"], "models") + os.sep,
+        )
+        X_train, X_test, y_train, y_test = training.prepare_data_from_parquet(
+            processed["features_path"]
+        )
+        model, cv_score, accuracy = training.evaluate_candidate(
+            params, X_train, y_train, X_test, y_test
+        )
+
+        name = "_".join(f"{key}-{value}" for key, value in sorted(params.items()))
+        model_path = os.path.join(processed["run_dir"], "candidates", f"{name}.pkl")
+        atomic_write(model_path, lambda f: pickle.dump(model, f))
+        return {
+            "params": params,
+            "cv_score": float(cv_score),
+            "accuracy": float(accuracy),
+            "model_path": model_path,
+        }
+
+    @task
+    def register_best(processed: dict, candidates: list[dict]) -> int:
+        import pickle
+        from config.paths_config import MODEL_DIR
+        from src.feature_transformer import FeatureTransformer
+        from src.model_training import ModelTraining
+
+        best = max(candidates, key=lambda candidate: candidate["cv_score"])
+        with open(best["model_path"], "rb") as f:
+            model = pickle.load(f)
+
+        # Registered in the same v{N}/ directory (and swap) as the model
+        transformer = FeatureTransformer.load(processed["transformer_path"])
+        return ModelTraining(
+            feature_store=None, model_save_path=MODEL_DIR + os.sep
+        ).save_model(
+            model,
+            metadata={
+                "accuracy": best["accuracy"],
+                "cv_score": best["cv_score"],
+                **best["params"],
+            },
+            transformer=transformer,
+        )
+
+    processed = process(ingest())
+    store_features(processed)
+    candidates = train_candidate.partial(processed=processed).expand(
+        params=candidate_params()
+    )
+    register_best(processed, candidates)
+
+
+survivor_training_pipeline()
@@ -0,0 +1,31 @@
+# === Gunicorn Configuration for the SurviverFlow App ===
+import os
+import shutil
+
+# === Multiprocess Prometheus Metrics ===
+# Every worker writes its metric values to files in this shared directory and
+# /metrics aggregates them, so counters and histograms cover all workers. It
+# must be set before the workers import prometheus_client.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc"
+)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+# Seconds a worker may block on one request before the arbiter kills it; the
+# app reads the same variable to keep its own waits below this
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+
+def on_starting(server):
+    # Start from an empty directory so values from a previous run are dropped
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Remove the dead worker's live gauge files; its counters stay aggregated
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -2,7 +2,7 @@
 from src.data_ingestion import DataIngestion
 from src.data_processing import DataProcessing
 from src.model_training import ModelTraining
-from src.feature_store import RedisFeatureStore
+from src.feature_store import get_feature_store
 
 # Configurations
 from config.paths_config import *
@@ -14,8 +14,9 @@ if __name__ == "__main__":
     data_ingestion = DataIngestion(DB_CONFIG, RAW_DIR)
     data_ingestion.run()
 
-    # Step 2: Initialize Redis Feature Store
-    feature_store = RedisFeatureStore()
+    # Step 2: Initialize Redis Feature Store (sharded if REDIS_SHARD_URLS is set);
+    # old snapshots are collected inline, before this process exits
+    feature_store = get_feature_store(background_gc=False)
 
     # Step 3: Data cleaning, feature engineering, encoding, SMOTE, and Redis storage
     data_processor = DataProcessing(TRAIN_PATH, TEST_PATH, feature_store)
@@ -0,0 +1,214 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.fast_inference import ForestPredictor
+from src.feature_transformer import FeatureTransformer
+from src.model_registry import ModelRegistry
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import MODEL_PATH, PREDICTIONS_DIR, TRANSFORMER_PATH
+
+logger = get_logger(__name__)
+
+# Raw CSV column types, fixed so every chunk parses the same way: inferred
+# per chunk, a chunk whose Name values are all missing would be float64
+RAW_DTYPES = {
+    "Pclass": "float64",
+    "Name": "string",
+    "Sex": "string",
+    "Age": "float64",
+    "SibSp": "float64",
+    "Parch": "float64",
+    "Ticket": "string",
+    "Fare": "float64",
+    "Cabin": "string",
+    "Embarked": "string",
+}
+
+# Model and transformer loaded once per worker process by _init_worker
+_worker_state = {}
+
+
+def _init_worker(model_path, transformer_path):
+    with open(model_path, "rb") as model_file:
+        _worker_state["predictor"] = ForestPredictor(pickle.load(model_file))
+    _worker_state["transformer"] = FeatureTransformer.load(transformer_path)
+
+
+def _score_chunk(chunk, id_column):
+    """Transform one raw chunk and return its predictions as a DataFrame."""
+    predictor = _worker_state["predictor"]
+    features = _worker_state["transformer"].transform_array(chunk)
+    probabilities = predictor.predict_proba(features)
+
+    scored = pd.DataFrame(
+        {
+            "prediction": predictor.classes_[probabilities.argmax(axis=1)],
+            "probability": probabilities[:, 1],
+        }
+    )
+    if id_column in chunk:
+        scored.insert(0, id_column, chunk[id_column].to_numpy())
+    return scored
+
+
+class BatchScoring:
+    """
+    Score a raw passenger CSV offline with the saved model.
+
+    The input is streamed in chunks, transformed and scored across worker
+    processes, and written to Parquet incrementally so memory stays bounded
+    by a few chunks regardless of the input size. By default the model and
+    its transformer are the registry's LATEST version, as online serving loads.
+    """
+
+    def __init__(
+        self,
+        input_path,
+        output_path=None,
+        model_path=None,
+        transformer_path=None,
+        chunk_size=100_000,
+        workers=None,
+        id_column="PassengerId",
+        registry=None,
+    ):
+        self.input_path = input_path
+        self.output_path = output_path or os.path.join(
+            PREDICTIONS_DIR,
+            os.path.splitext(os.path.basename(input_path))[0] + "_predictions.parquet",
+        )
+        if model_path is None:
+            model_path, default_transformer = self._serving_artifacts(registry)
+            transformer_path = transformer_path or default_transformer
+        self.model_path = model_path
+        self.transformer_path = transformer_path or TRANSFORMER_PATH
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count()
+        self.id_column = id_column
+
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        logger.info("Batch Scoring initialized...")
+
+    @staticmethod
+    def _serving_artifacts(registry=None):
+        """
+        (model, transformer) paths of the registry's LATEST version, resolved
+        once for every worker, else the legacy pkl and transformer.
+        """
+        registry = registry or ModelRegistry()
+        version = registry.latest_version()
+        if version is None:
+            logger.info(f"No registered model, scoring with {MODEL_PATH}")
+            return MODEL_PATH, TRANSFORMER_PATH
+        logger.info(f"Scoring with registered model version {version}")
+        transformer_path = registry.transformer_path(version)
+        if not os.path.exists(transformer_path):
+            transformer_path = TRANSFORMER_PATH  # Registered without one
+        return registry.model_path(version), transformer_path
+
+    def _scored_chunks(self):
+        """Yield scored chunks in input order, keeping a bounded number in flight."""
+        chunks = pd.read_csv(
+            self.input_path, chunksize=self.chunk_size, dtype=RAW_DTYPES
+        )
+        init_args = (self.model_path, self.transformer_path)
+
+        if self.workers == 1:
+            _init_worker(*init_args)
+            for chunk in chunks:
+                yield len(chunk), _score_chunk(chunk, self.id_column)
+            return
+
+        with ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=init_args
+        ) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(
+                    (len(chunk), pool.submit(_score_chunk, chunk, self.id_column))
+                )
+                if len(pending) >= 2 * self.workers:
+                    n_rows, future = pending.popleft()
+                    yield n_rows, future.result()
+            while pending:
+                n_rows, future = pending.popleft()
+                yield n_rows, future.result()
+
+    def run(self):
+        try:
+            logger.info(
+                f"Scoring {self.input_path} with {self.workers} workers "
+                f"({self.chunk_size} rows per chunk)"
+            )
+            start = time.perf_counter()
+            tmp_path = f"{self.output_path}.tmp"
+            writer = None
+            total = 0
+
+            try:
+                for n_rows, scored in self._scored_chunks():
+                    table = pa.Table.from_pandas(scored, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table)
+
+                    total += n_rows
+                    elapsed = time.perf_counter() - start
+                    logger.info(
+                        f"Scored {total} rows in {elapsed:.1f}s "
+                        f"({total / elapsed:,.0f} rows/s)"
+                    )
+            except BaseException:
+                # Don't leave a partial file behind for the next run to find
+                if writer is not None:
+                    writer.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            if writer is None:
+                raise ValueError(f"No rows to score in {self.input_path}")
+            writer.close()
+
+            # Publish the file only once it is complete
+            os.replace(tmp_path, self.output_path)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"Batch scoring completed: {total} rows in {elapsed:.1f}s "
+                f"({total / elapsed:,.0f} rows/s) -> {self.output_path}"
+            )
+            return self.output_path
+
+        except Exception as e:
+            logger.error(f"Error while batch scoring: {e}")
+            raise CustomException(str(e), sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score a raw passenger CSV with the saved model."
+    )
+    parser.add_argument("input", help="Raw passenger CSV (e.g. titanic_test.csv)")
+    parser.add_argument("--output", help="Parquet output path")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, help="Defaults to the CPU count")
+    parser.add_argument("--model", help="Defaults to the registry's LATEST model")
+    parser.add_argument("--transformer", help="Defaults to the model's transformer")
+    args = parser.parse_args()
+
+    BatchScoring(
+        args.input,
+        output_path=args.output,
+        model_path=args.model,
+        transformer_path=args.transformer,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    ).run()
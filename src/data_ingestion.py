@@ -16,6 +16,8 @@ class DataIngestion:
         # Initialize DB credentials and output directory path
         self.db_params = db_params
         self.output_dir = output_dir
+        self.train_path = os.path.join(output_dir, os.path.basename(TRAIN_PATH))
+        self.test_path = os.path.join(output_dir, os.path.basename(TEST_PATH))
 
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
@@ -66,8 +68,8 @@ class DataIngestion:
             train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
 
             # Save the split data to CSV files
-            train_df.to_csv(TRAIN_PATH, index=False)
-            test_df.to_csv(TEST_PATH, index=False)
+            train_df.to_csv(self.train_path, index=False)
+            test_df.to_csv(self.test_path, index=False)
 
             logger.info("Data splitting and saving completed.")
         except Exception as e:
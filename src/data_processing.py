@@ -1,7 +1,9 @@
+import os
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from imblearn.over_sampling import SMOTE
-from src.feature_store import RedisFeatureStore
+from src.feature_store import RedisFeatureStore, get_feature_store
+from src.feature_transformer import FeatureTransformer, FEATURE_NAMES
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from config.paths_config import *
@@ -11,11 +13,19 @@ logger = get_logger(__name__)
 
 class DataProcessing:
     def __init__(
-        self, train_data_path, test_data_path, feature_store: RedisFeatureStore
+        self,
+        train_data_path,
+        test_data_path,
+        feature_store: RedisFeatureStore,
+        transformer_path=TRANSFORMER_PATH,
+        processed_path=PROCESSED_FEATURES_PATH,
     ):
         # Initialize paths and feature store instance
         self.train_data_path = train_data_path
         self.test_data_path = test_data_path
+        self.transformer_path = transformer_path
+        self.processed_path = processed_path
+        self.transformer = FeatureTransformer()
 
         # Placeholders for datasets and processed features
         self.data = None
@@ -42,39 +52,23 @@ class DataProcessing:
 
     def preprocess_data(self):
         try:
-            # Handle missing values
-            self.data["Age"] = self.data["Age"].fillna(self.data["Age"].median())
-            self.data["Embarked"] = self.data["Embarked"].fillna(
-                self.data["Embarked"].mode()[0]
-            )
-            self.data["Fare"] = self.data["Fare"].fillna(self.data["Fare"].median())
-
-            # Encode categorical columns
-            self.data["Sex"] = self.data["Sex"].map({"male": 0, "female": 1})
-            self.data["Embarked"] = self.data["Embarked"].astype("category").cat.codes
-
-            # Feature engineering
-            self.data["Familysize"] = self.data["SibSp"] + self.data["Parch"] + 1
-            self.data["Isalone"] = (self.data["Familysize"] == 1).astype(int)
-            self.data["HasCabin"] = self.data["Cabin"].notnull().astype(int)
-
-            # Extract and encode title from the Name field
-            self.data["Title"] = (
-                self.data["Name"]
-                .str.extract(" ([A-Za-z]+)\.", expand=False)
-                .map({"Mr": 0, "Miss": 1, "Mrs": 2, "Master": 3, "Rare": 4})
-                .fillna(4)
-            )
-
-            # Create interaction features
-            self.data["Pclass_Fare"] = self.data["Pclass"] * self.data["Fare"]
-            self.data["Age_Fare"] = self.data["Age"] * self.data["Fare"]
+            # Fit the shared transformer (missing values, encodings, feature
+            # engineering) so serving applies exactly the same transforms
+            self.data = self.transformer.fit_transform(self.data)
 
             logger.info("Data preprocessing completed.")
         except Exception as e:
             logger.error(f"Error during preprocessing: {e}")
             raise CustomException(str(e))
 
+    def save_transformer(self):
+        try:
+            # Save fitted transformer alongside the model artifact
+            self.transformer.save(self.transformer_path)
+        except Exception as e:
+            logger.error(f"Error while saving feature transformer: {e}")
+            raise CustomException(str(e))
+
     def handle_imbalance_data(self):
         try:
             # Select features and target variable
@@ -104,27 +98,25 @@ class DataProcessing:
             logger.error(f"Error while handling imbalanced data: {e}")
             raise CustomException(str(e))
 
+    def save_processed_data(self):
+        try:
+            # Same rows and columns as the feature store, for training jobs
+            # that read the artifact instead of Redis
+            os.makedirs(os.path.dirname(self.processed_path) or ".", exist_ok=True)
+            self.data[["PassengerId"] + FEATURE_NAMES + ["Survived"]].to_parquet(
+                self.processed_path, index=False
+            )
+            logger.info(f"Processed features saved at {self.processed_path}")
+        except Exception as e:
+            logger.error(f"Error while saving processed data: {e}")
+            raise CustomException(str(e))
+
     def store_feature_in_redis(self):
         try:
-            batch_data = {}
-            # Iterate through each row and prepare data for Redis
-            for idx, row in self.data.iterrows():
-                entity_id = row["PassengerId"]
-                features = {
-                    "Age": row["Age"],
-                    "Fare": row["Fare"],
-                    "Pclass": row["Pclass"],
-                    "Sex": row["Sex"],
-                    "Embarked": row["Embarked"],
-                    "Familysize": row["Familysize"],
-                    "Isalone": row["Isalone"],
-                    "HasCabin": row["HasCabin"],
-                    "Title": row["Title"],
-                    "Pclass_Fare": row["Pclass_Fare"],
-                    "Age_Fare": row["Age_Fare"],
-                    "Survived": row["Survived"],
-                }
-                batch_data[entity_id] = features
+            # Build {PassengerId: features} for all rows at once
+            batch_data = self.data.set_index("PassengerId")[
+                FEATURE_NAMES + ["Survived"]
+            ].to_dict(orient="index")
 
             # Store batch data in Redis feature store
             self.feature_store.store_batch_features(batch_data)
@@ -147,6 +139,8 @@ class DataProcessing:
             self.preprocess_data()  # Step 2: Preprocess and engineer features
             self.handle_imbalance_data()  # Step 3: Handle imbalanced classes
             self.store_feature_in_redis()  # Step 4: Store processed features in Redis
+            self.save_transformer()  # Step 5: Save fitted transformer for serving
+            self.save_processed_data()  # Step 6: Save features as Parquet
             logger.info("Data processing pipeline completed successfully.")
         except Exception as e:
             logger.error(f"Pipeline execution error: {e}")
@@ -154,8 +148,8 @@ class DataProcessing:
 
 
 if __name__ == "__main__":
-    # Create Redis feature store instance
-    feature_store = RedisFeatureStore()
+    # Create Redis feature store instance (collects old snapshots inline)
+    feature_store = get_feature_store(background_gc=False)
 
     # Initialize and run the data processing pipeline
     data_processor = DataProcessing(TRAIN_PATH, TEST_PATH, feature_store)
@@ -0,0 +1,207 @@
+"""
+Lightweight two-sample drift tests for serving.
+
+`DriftDetector` follows alibi-detect's `KSDrift` / `TabularDrift`
+semantics (per-feature K-S or chi-squared tests, Bonferroni correction,
+the same `predict` output) using only numpy and scipy, so workers do not
+import alibi-detect and its deep-learning backends.
+"""
+
+import numpy as np
+from scipy.special import chdtrc
+from scipy.stats import kstwo
+
+# Floor for empty bins, so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+class DriftDetector:
+    """
+    Per-feature drift tests against a fixed reference set.
+
+    Continuous features get a two-sample K-S test, categorical features
+    (column indices in `categorical`) a chi-squared test on category counts.
+    The reference columns are sorted once; a batch is scored for all
+    continuous features with two `searchsorted` calls on complex keys
+    (real part = feature index, imaginary part = value), so each feature's
+    values only ever compare against the same feature's reference values.
+    """
+
+    def __init__(self, x_ref, p_val=0.05, categorical=(), n_bins=10):
+        x_ref = np.asarray(x_ref, dtype=np.float64)
+        self.n_ref, self.n_features = x_ref.shape
+        self.p_val = p_val
+        self.categorical = sorted(categorical)
+        self.continuous = [
+            f for f in range(self.n_features) if f not in set(self.categorical)
+        ]
+
+        # Sorted reference keys for every continuous feature, one block each
+        ref_sorted = np.sort(x_ref[:, self.continuous], axis=0)
+        self._ref_keys = self._keys(ref_sorted)
+        self._ref_offsets = np.arange(len(self.continuous))[:, None] * self.n_ref
+
+        self._ref_counts = {
+            f: np.unique(x_ref[:, f], return_counts=True) for f in self.categorical
+        }
+
+        # PSI bins: reference deciles for continuous features, categories otherwise
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        self._psi_edges = {
+            f: np.unique(np.quantile(x_ref[:, f], quantiles)) for f in self.continuous
+        }
+        self._psi_ref = {
+            f: self._bin_fractions(x_ref[:, f], f) for f in self.continuous
+        }
+
+    @staticmethod
+    def _keys(columns):
+        """Complex sort keys for a (rows, features) array sorted per column."""
+        keys = np.empty(columns.size, dtype=np.complex128)
+        # Set the parts separately: complex(0, inf) arithmetic would give nan
+        keys.real = np.repeat(np.arange(columns.shape[1]), columns.shape[0])
+        keys.imag = columns.T.ravel()
+        return keys
+
+    def _ks(self, x):
+        """K-S distances and asymptotic two-sided p-values, all features at once."""
+        n_rows = x.shape[0]
+        x_keys = self._keys(np.sort(x[:, self.continuous], axis=0))
+        x_offsets = np.arange(len(self.continuous))[:, None] * n_rows
+        shape = (len(self.continuous), n_rows)
+
+        # ECDFs of both samples at (and just before) every value in x
+        cdf_ref = [
+            (
+                self._ref_keys.searchsorted(x_keys, side).reshape(shape)
+                - self._ref_offsets
+            )
+            / self.n_ref
+            for side in ("right", "left")
+        ]
+        cdf_x = [
+            (x_keys.searchsorted(x_keys, side).reshape(shape) - x_offsets) / n_rows
+            for side in ("right", "left")
+        ]
+        distance = np.maximum(
+            np.abs(cdf_ref[0] - cdf_x[0]).max(axis=1),
+            np.abs(cdf_ref[1] - cdf_x[1]).max(axis=1),
+        )
+
+        # As scipy.stats.ks_2samp(mode="asymp")
+        effective_n = np.round(self.n_ref * n_rows / (self.n_ref + n_rows))
+        p_val = np.clip(kstwo.sf(distance, effective_n), 0, 1)
+        return p_val, distance
+
+    def _chi2(self, x):
+        """Chi-squared statistics and p-values for the categorical features."""
+        stats, dofs = [], []
+        for f in self.categorical:
+            ref_categories, ref_counts = self._ref_counts[f]
+            x_categories, x_counts = np.unique(x[:, f], return_counts=True)
+
+            # Counts over the union of categories, as TabularDrift does
+            categories = np.union1d(ref_categories, x_categories)
+            observed = np.zeros((2, len(categories)))
+            observed[0, categories.searchsorted(ref_categories)] = ref_counts
+            observed[1, categories.searchsorted(x_categories)] = x_counts
+
+            dof = len(categories) - 1
+            if dof == 0:
+                stats.append(0.0)
+                dofs.append(1)  # chdtrc(1, 0) == 1, matching scipy's p-value
+                continue
+            expected = np.outer(observed.sum(axis=1), observed.sum(axis=0))
+            expected /= observed.sum()
+            if dof == 1:
+                # Yates' continuity correction, as scipy.stats.chi2_contingency
+                diff = expected - observed
+                observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+            stats.append(((observed - expected) ** 2 / expected).sum())
+            dofs.append(dof)
+        stats = np.asarray(stats)
+        return chdtrc(dofs, stats), stats
+
+    def _check(self, x):
+        x = np.asarray(x, dtype=np.float64).reshape(len(x), -1)
+        if x.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {x.shape[1]} features, but the reference has {self.n_features}"
+            )
+        return x
+
+    def feature_score(self, x):
+        """Per-feature p-values and distances (K-S D or chi-squared statistic)."""
+        x = self._check(x)
+        p_val = np.zeros(self.n_features, dtype=np.float32)
+        distance = np.zeros_like(p_val)
+        if self.continuous:
+            p_val[self.continuous], distance[self.continuous] = self._ks(x)
+        if self.categorical:
+            p_val[self.categorical], distance[self.categorical] = self._chi2(x)
+        return p_val, distance
+
+    def predict(self, x, drift_type="batch", return_p_val=True, return_distance=True):
+        """
+        Alibi-detect compatible result: `{"meta": ..., "data": {"is_drift", ...}}`.
+
+        With drift_type="batch" the batch drifts if any feature's p-value is
+        below the Bonferroni-corrected threshold `p_val / n_features`; with
+        drift_type="feature", `is_drift` is per feature at `p_val`.
+        """
+        p_vals, distance = self.feature_score(x)
+        if drift_type == "batch":
+            threshold = self.p_val / self.n_features
+            is_drift = int((p_vals < threshold).any())
+        elif drift_type == "feature":
+            threshold = self.p_val
+            is_drift = (p_vals < threshold).astype(int)
+        else:
+            raise ValueError(
+                f"drift_type must be 'batch' or 'feature', not {drift_type!r}"
+            )
+
+        data = {"is_drift": is_drift, "threshold": threshold}
+        if return_p_val:
+            data["p_val"] = p_vals
+        if return_distance:
+            data["distance"] = distance
+        return {
+            "meta": {
+                "name": type(self).__name__,
+                "detector_type": "drift",
+                "online": False,
+                "data_type": "tabular",
+            },
+            "data": data,
+        }
+
+    def _bin_fractions(self, values, f):
+        bins = self._psi_edges[f].searchsorted(values, side="right")
+        counts = np.bincount(bins, minlength=len(self._psi_edges[f]) + 1)
+        return np.maximum(counts / len(values), PSI_EPSILON)
+
+    def psi(self, x):
+        """
+        Population stability index per feature (0 = same distribution).
+
+        Continuous features are binned on the reference deciles, categorical
+        features by category; empty bins are floored at PSI_EPSILON.
+        """
+        x = self._check(x)
+        psi = np.zeros(self.n_features)
+        for f in self.continuous:
+            expected, actual = self._psi_ref[f], self._bin_fractions(x[:, f], f)
+            psi[f] = ((actual - expected) * np.log(actual / expected)).sum()
+        for f in self.categorical:
+            ref_categories, ref_counts = self._ref_counts[f]
+            x_categories, x_counts = np.unique(x[:, f], return_counts=True)
+            categories = np.union1d(ref_categories, x_categories)
+            expected = np.zeros(len(categories))
+            actual = np.zeros(len(categories))
+            expected[categories.searchsorted(ref_categories)] = ref_counts / self.n_ref
+            actual[categories.searchsorted(x_categories)] = x_counts / len(x)
+            expected = np.maximum(expected, PSI_EPSILON)
+            actual = np.maximum(actual, PSI_EPSILON)
+            psi[f] = ((actual - expected) * np.log(actual / expected)).sum()
+        return psi
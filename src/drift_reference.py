@@ -0,0 +1,371 @@
+"""
+Bounded-size drift reference, maintained as entities are stored.
+
+Instead of reading every entity in the feature store to build the drift
+detector's reference, each snapshot keeps a `DriftReference`: a
+class-stratified reservoir sample of feature rows, and optionally one KLL
+quantile sketch per continuous feature (exact value counts for discrete
+ones). All have a fixed size, so reference memory and drift test cost stay
+constant as the store grows.
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from src.feature_transformer import CATEGORICAL_FEATURES, FEATURE_NAMES
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Reservoir rows kept per class, and the default reference size
+DRIFT_REFERENCE_SIZE = int(os.getenv("DRIFT_REFERENCE_SIZE", 1000))
+# KLL sketch size per feature (0 = raw reservoir rows only)
+DRIFT_REFERENCE_SKETCH_K = int(os.getenv("DRIFT_REFERENCE_SKETCH_K", 0))
+# Discrete features counted exactly instead of sketched: their drift test
+# (chi-squared) and scaling need each category's exact share
+EXACT_COUNT_FEATURES = CATEGORICAL_FEATURES + ["Isalone", "HasCabin"]
+LABEL_COLUMN = "Survived"
+UNLABELED = "unlabeled"
+
+# Entities per read when a reference has to be built by scanning a snapshot
+SCAN_CHUNK_SIZE = 10000
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Level h holds items of weight 2**h. When a level reaches its capacity
+    (k at the top, shrinking by 2/3 per level below) it is sorted and every
+    other item, from a random offset, moves up a level. This keeps O(k)
+    items for any stream length, with rank error around 1-2% at k=200.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        while True:
+            full = [
+                level
+                for level, items in enumerate(self.levels)
+                if len(items) >= self._capacity(level)
+            ]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            paired = len(items) - len(items) % 2  # An odd item out stays put
+            offset = int(self._rng.integers(2))
+            self.levels[level + 1] = np.concatenate(
+                [self.levels[level + 1], items[offset:paired:2]]
+            )
+            self.levels[level] = items[paired:]
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate(
+            [np.full(len(lv), 2.0**level) for level, lv in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = cumulative.searchsorted(np.asarray(qs) * cumulative[-1], side="left")
+        return items[order][np.minimum(ranks, len(items) - 1)]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "levels": [lv.tolist() for lv in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["k"], seed=state["n"])
+        sketch.n = state["n"]
+        sketch.levels = [
+            np.asarray(level, dtype=np.float64) for level in state["levels"]
+        ]
+        return sketch
+
+
+class CategoryCounts:
+    """
+    Exact value counts of a discrete feature, with KLLSketch's interface.
+
+    `quantiles` is the exact inverse CDF, so on an evenly spaced grid each
+    category fills its exact share of the rows (to within one row).
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.counts = {}
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.n += int(counts.sum())
+
+    def quantiles(self, qs):
+        if not self.n:
+            return np.full(len(qs), np.nan)
+        values = np.array(sorted(self.counts))
+        cumulative = np.cumsum([self.counts[value] for value in values])
+        ranks = cumulative.searchsorted(np.asarray(qs) * self.n, side="left")
+        return values[np.minimum(ranks, len(values) - 1)]
+
+    def to_dict(self):
+        return {"n": self.n, "counts": sorted(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, state):
+        counts = cls()
+        counts.n = state["n"]
+        counts.counts = {float(value): int(count) for value, count in state["counts"]}
+        return counts
+
+
+class DriftReference:
+    """
+    Class-stratified reservoir sample (plus optional sketches) of feature rows.
+
+    Each class label keeps its own reservoir of up to `capacity` rows
+    (Algorithm R), so a rare class is never crowded out. `sample` draws
+    from the reservoirs in proportion to how often each class was seen,
+    which keeps the reference's class mix equal to the store's.
+
+    With `sketch_k`, features in `categorical` keep exact value counts and
+    the others a KLL sketch.
+    """
+
+    def __init__(
+        self,
+        capacity=DRIFT_REFERENCE_SIZE,
+        sketch_k=DRIFT_REFERENCE_SKETCH_K,
+        feature_names=FEATURE_NAMES,
+        seed=0,
+        categorical=EXACT_COUNT_FEATURES,
+    ):
+        self.capacity = capacity
+        self.feature_names = list(feature_names)
+        self.seed = seed
+        self.classes = {}  # label -> {"seen": int, "rows": (m, n_features) array}
+        self.sketches = (
+            [
+                (
+                    CategoryCounts()
+                    if name in categorical
+                    else KLLSketch(sketch_k, seed=seed + f)
+                )
+                for f, name in enumerate(self.feature_names)
+            ]
+            if sketch_k
+            else None
+        )
+
+    @property
+    def seen(self):
+        return sum(stratum["seen"] for stratum in self.classes.values())
+
+    @staticmethod
+    def _label(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return UNLABELED
+        return str(int(value))
+
+    def add(self, features):
+        """Add one entity's feature dict (with its label, if it has one)."""
+        self.add_batch({None: features})
+
+    def add_batch(self, batch_data):
+        """Add {entity_id: feature dict}, as passed to store_batch_features."""
+        features = [f for f in batch_data.values() if f]
+        rows = np.array(
+            [[f.get(name, np.nan) for name in self.feature_names] for f in features],
+            dtype=np.float64,
+        ).reshape(len(features), len(self.feature_names))
+        self.add_rows(rows, [f.get(LABEL_COLUMN) for f in features])
+
+    def add_matrix(self, matrix, columns):
+        """Add a (rows, columns) matrix, e.g. a local snapshot, picking our features."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        rows = np.full((len(matrix), len(self.feature_names)), np.nan)
+        for f, name in enumerate(self.feature_names):
+            if name in columns:
+                rows[:, f] = matrix[:, columns.index(name)]
+        labels = (
+            matrix[:, columns.index(LABEL_COLUMN)]
+            if LABEL_COLUMN in columns
+            else [None] * len(matrix)
+        )
+        self.add_rows(rows, labels)
+
+    def add_rows(self, rows, labels):
+        """Add a (rows, features) array in `feature_names` order with its labels."""
+        rows = np.asarray(rows, dtype=np.float64)
+        labels = np.array([self._label(label) for label in labels], dtype=object)
+        for label in np.unique(labels) if len(labels) else []:
+            self._add_to_reservoir(label, rows[labels == label])
+        if self.sketches is not None:
+            for f, sketch in enumerate(self.sketches):
+                sketch.update(rows[:, f])
+
+    def _add_to_reservoir(self, label, rows):
+        stratum = self.classes.setdefault(
+            label, {"seen": 0, "rows": np.empty((0, len(self.feature_names)))}
+        )
+        seen, reservoir = stratum["seen"], stratum["rows"]
+
+        # Fill up to capacity, then item t (0-based) replaces a random slot
+        # with probability capacity / (t + 1): Algorithm R, one batch at once
+        fill = max(0, min(self.capacity - len(reservoir), len(rows)))
+        reservoir = np.concatenate([reservoir, rows[:fill]])
+        rest = rows[fill:]
+        if len(rest):
+            rng = np.random.default_rng([self.seed, seen])
+            t = seen + fill + np.arange(len(rest))
+            slots = rng.integers(0, t + 1)
+            accepted = slots < self.capacity
+            slots, rest = slots[accepted], rest[accepted]
+            # Later rows win a contested slot, as they would one at a time
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            reservoir[slots[last]] = rest[last]
+
+        stratum["seen"] = seen + len(rows)
+        stratum["rows"] = reservoir
+
+    def sample(self, size=None):
+        """Up to `size` rows, stratified by class in proportion to `seen`."""
+        size = min(self.capacity if size is None else size, self.seen)
+        if not size:
+            return np.empty((0, len(self.feature_names)))
+        labels = sorted(self.classes)
+        seen = np.array([self.classes[label]["seen"] for label in labels])
+
+        # Largest-remainder allocation, so the counts add up to `size`
+        exact = size * seen / seen.sum()
+        counts = np.floor(exact).astype(int)
+        counts[np.argsort(counts - exact)[: size - counts.sum()]] += 1
+
+        rng = np.random.default_rng(self.seed)
+        parts = []
+        for label, count in zip(labels, counts):
+            rows = self.classes[label]["rows"]
+            count = min(count, len(rows))
+            parts.append(rows[rng.choice(len(rows), count, replace=False)])
+        return np.concatenate(parts)
+
+    def reference(self, size=None):
+        """
+        Reference rows for the drift detector.
+
+        With sketches, each column is that feature's quantiles on an evenly
+        spaced grid (for discrete features, each category in its exact share):
+        rows are not joint observations, which is fine for the per-feature
+        K-S / chi-squared tests and per-feature scaling.
+        """
+        if self.sketches is None:
+            return self.sample(size)
+        size = min(self.capacity if size is None else size, self.seen)
+        grid = (np.arange(size) + 0.5) / size
+        return np.column_stack([sketch.quantiles(grid) for sketch in self.sketches])
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "capacity": self.capacity,
+                "feature_names": self.feature_names,
+                "seed": self.seed,
+                "classes": {
+                    label: {"seen": s["seen"], "rows": s["rows"].tolist()}
+                    for label, s in self.classes.items()
+                },
+                "sketches": (
+                    [sketch.to_dict() for sketch in self.sketches]
+                    if self.sketches is not None
+                    else None
+                ),
+            }
+        )
+
+    @classmethod
+    def from_json(cls, value):
+        state = json.loads(value)
+        reference = cls(
+            state["capacity"],
+            sketch_k=0,
+            feature_names=state["feature_names"],
+            seed=state["seed"],
+        )
+        for label, stratum in state["classes"].items():
+            rows = np.asarray(stratum["rows"], dtype=np.float64)
+            reference.classes[label] = {
+                "seen": stratum["seen"],
+                "rows": rows.reshape(len(rows), len(reference.feature_names)),
+            }
+        if state["sketches"] is not None:
+            reference.sketches = [
+                CategoryCounts.from_dict(s) if "counts" in s else KLLSketch.from_dict(s)
+                for s in state["sketches"]
+            ]
+        return reference
+
+
+def build_drift_reference(feature_store, version=None, chunk_size=SCAN_CHUNK_SIZE):
+    """Build a reference by scanning a snapshot in chunks (bounded memory)."""
+    version = feature_store.current_version() if version is None else version
+    entity_ids = feature_store.get_all_entity_ids(version)
+    reference = DriftReference()
+    for start in range(0, len(entity_ids), chunk_size):
+        reference.add_batch(
+            feature_store.get_batch_features(
+                entity_ids[start : start + chunk_size], version
+            )
+        )
+    return reference
+
+
+def load_drift_reference(feature_store, version=None):
+    """The snapshot's stored reference, or one built by scanning it."""
+    version = feature_store.current_version() if version is None else version
+    reference = feature_store.get_drift_reference(version)
+    if reference is None:
+        logger.warning(
+            f"No stored drift reference for snapshot {version}, scanning it "
+            "(run `python -m src.drift_reference` to store one)"
+        )
+        reference = build_drift_reference(feature_store, version)
+    return reference
+
+
+if __name__ == "__main__":
+    from src.feature_store import get_feature_store
+
+    parser = argparse.ArgumentParser(
+        description="Build and store the drift reference for the current snapshot."
+    )
+    parser.parse_args()
+
+    store = get_feature_store()
+    version = store.current_version()
+    reference = build_drift_reference(store, version)
+    store.save_drift_reference(reference, version)
+    print(f"Stored a {reference.seen}-entity drift reference for snapshot {version}")
@@ -0,0 +1,76 @@
+import threading
+import numpy as np
+
+
+class InlineScaler:
+    """
+    StandardScaler.transform as plain NumPy arithmetic.
+
+    Uses the fitted mean and scale directly so single-row requests skip
+    sklearn's feature-name and dtype validation.
+    """
+
+    def __init__(self, mean, scale):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_standard_scaler(cls, scaler):
+        return cls(scaler.mean_, scaler.scale_)
+
+    def transform(self, X, out=None):
+        out = np.subtract(X, self.mean, out=out)
+        return np.divide(out, self.scale, out=out)
+
+
+class ForestPredictor:
+    """
+    Tree-ensemble inference with input validation skipped.
+
+    For fitted forests the per-tree `tree_` objects are called directly on a
+    float32 C-contiguous matrix (what RandomForestClassifier.predict_proba
+    does after validating). Other estimators fall back to `predict_proba`.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        estimators = getattr(model, "estimators_", None)
+        self.trees = (
+            [estimator.tree_ for estimator in estimators]
+            if estimators is not None and getattr(model, "n_outputs_", 1) == 1
+            else None
+        )
+        self.n_classes = len(self.classes_)
+
+    def predict_proba(self, X):
+        if self.trees is None:
+            return self.model.predict_proba(X)
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+        for tree in self.trees:
+            values = tree.predict(X)[:, : self.n_classes]
+            # Older artifacts store class counts rather than fractions
+            proba += values / values.sum(axis=1, keepdims=True)
+        proba /= len(self.trees)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class RowBuffers(threading.local):
+    """Per-thread preallocated (1, n_features) rows for the request path."""
+
+    def __init__(self, n_features):
+        self.raw = np.empty((1, n_features), dtype=np.float64)
+        self.scaled = np.empty((1, n_features), dtype=np.float64)
+
+
+def parse_form_row(form, feature_names, out):
+    """Parse form fields into `out` (shape (1, n)) in feature_names order."""
+    row = out[0]
+    for i, name in enumerate(feature_names):
+        row[i] = float(form[name])
+    return out
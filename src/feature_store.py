@@ -1,59 +1,564 @@
 import redis
 import json
 import os
+import bisect
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
+from src.drift_reference import DriftReference
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Load environment variables from .env file (in dev/local)
 load_dotenv()
 
+# Keys per pipeline / MGET round trip in batch operations
+BATCH_CHUNK_SIZE = 1000
+
+# === Connection Pool Settings (overridable via environment) ===
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 5))
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", 5))
+REDIS_BACKOFF_BASE = float(os.getenv("REDIS_BACKOFF_BASE", 0.05))
+REDIS_BACKOFF_CAP = float(os.getenv("REDIS_BACKOFF_CAP", 2))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+# === Snapshot Keys ===
+CURRENT_VERSION_KEY = "features:current_version"
+VERSION_SEQ_KEY = "features:version_seq"
+VERSIONS_KEY = "features:versions"
+PUBLISHED_VERSIONS_KEY = "features:published_versions"
+VERSION_STARTED_KEY = "features:version_started"
+KEEP_VERSIONS = int(os.getenv("FEATURE_STORE_KEEP_VERSIONS", 2))
+# Unpublished versions older than this are treated as failed loads and collected
+ABANDONED_AFTER = float(os.getenv("FEATURE_STORE_ABANDONED_AFTER", 24 * 3600))
+LEGACY_KEY_PATTERN = "entity:*:features"
+# New entities are queued and folded into the stored drift reference this
+# many at a time, instead of rewriting the whole reference for each one
+DRIFT_REFERENCE_FOLD_BATCH = int(os.getenv("DRIFT_REFERENCE_FOLD_BATCH", 100))
+
+# One pool per Redis URL, shared by every store in the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(redis_url):
+    """Return the process-wide connection pool for `redis_url`."""
+    with _pools_lock:
+        pool = _pools.get(redis_url)
+        if pool is None:
+            # rediss:// URLs use TLS (for Upstash or Render secret)
+            pool = redis.ConnectionPool.from_url(
+                redis_url,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                retry=Retry(
+                    ExponentialWithJitterBackoff(
+                        cap=REDIS_BACKOFF_CAP, base=REDIS_BACKOFF_BASE
+                    ),
+                    REDIS_RETRIES,
+                ),
+            )
+            _pools[redis_url] = pool
+            logger.info(f"Redis connection pool created (max {REDIS_MAX_CONNECTIONS})")
+        return pool
+
+
+def _pool_usage(pool):
+    # redis-py has no public API for these: read the private attributes with
+    # defaults, so a release that renames them reports None instead of failing
+    in_use = getattr(pool, "_in_use_connections", None)
+    available = getattr(pool, "_available_connections", None)
+    return {
+        "max": getattr(pool, "max_connections", None),
+        "created": getattr(pool, "_created_connections", None),
+        "in_use": len(in_use) if in_use is not None else None,
+        "available": len(available) if available is not None else None,
+    }
+
+
+def pool_stats():
+    """Connection usage of every pool in this process, keyed by URL."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {url: _pool_usage(pool) for url, pool in pools.items()}
+
 
 class RedisFeatureStore:
-    def __init__(self):
-        redis_url = os.getenv("REDIS_URL")
+    def __init__(self, redis_url=None, client=None, background_gc=True):
+        self.background_gc = background_gc
+
+        # Local Redis (usually no TLS) unless REDIS_URL is set
         redis_host = os.getenv("REDIS_HOST", "localhost")
         redis_port = int(os.getenv("REDIS_PORT", 6379))
+        self.url = (
+            redis_url
+            or os.getenv("REDIS_URL")
+            or f"redis://{redis_host}:{redis_port}/0"
+        )
 
-        try:
-            if redis_url:
-                # If URL starts with rediss:// use TLS (for Upstash or Render secret)
-                self.client = redis.StrictRedis.from_url(
-                    redis_url, decode_responses=True
-                )
-                print("[Redis] Connected via REDIS_URL (TLS if rediss://)")
-            else:
-                # Local Redis (usually no TLS)
-                self.client = redis.StrictRedis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=0,
-                    decode_responses=True,
-                    ssl=False,
-                )
-                print("[Redis] Connected via host/port")
-
-            # Test connection
-            self.client.ping()
-            print("[Redis] Connection successful")
+        # Connect lazily: the client is built on first use from the shared
+        # pool, so constructing a store never blocks on Redis
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.StrictRedis(
+                connection_pool=get_connection_pool(self.url)
+            )
+        return self._client
 
+    def ping(self):
+        """Check connectivity (retried with backoff by the pool)."""
+        try:
+            return self.client.ping()
         except redis.ConnectionError as e:
             raise ConnectionError(f"[Redis] Connection failed: {e}")
 
+    @staticmethod
+    def _key(entity_id, version=None):
+        if version is None:
+            # Unversioned layout written before snapshots existed
+            return f"entity:{entity_id}:features"
+        return f"v{version}:entity:{entity_id}:features"
+
+    @staticmethod
+    def _entities_key(version):
+        return f"v{version}:entities"
+
+    @staticmethod
+    def _reference_key(version):
+        return f"v{version}:drift_reference"
+
+    @staticmethod
+    def _pending_key(version):
+        return f"v{version}:drift_reference:pending"
+
+    # === Snapshot Versions ===
+    def current_version(self):
+        """The published snapshot version, or None for the unversioned layout."""
+        version = self.client.get(CURRENT_VERSION_KEY)
+        return int(version) if version is not None else None
+
+    def begin_version(self):
+        """Reserve a new, not yet visible, snapshot version."""
+        version = self.client.incr(VERSION_SEQ_KEY)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(VERSIONS_KEY, version)
+        pipe.hset(VERSION_STARTED_KEY, version, time.time())
+        pipe.execute()
+        return version
+
+    def write_version(self, batch_data, version):
+        # Pipeline writes so a batch costs one round trip per chunk
+        items = list(batch_data.items())
+        for start in range(0, len(items), BATCH_CHUNK_SIZE):
+            chunk = items[start : start + BATCH_CHUNK_SIZE]
+            pipe = self.client.pipeline(transaction=False)
+            for entity_id, features in chunk:
+                pipe.set(self._key(entity_id, version), json.dumps(features))
+            pipe.sadd(self._entities_key(version), *[eid for eid, _ in chunk])
+            pipe.execute()
+
+    def write_drift_reference(self, batch_data, version):
+        reference = DriftReference()
+        reference.add_batch(batch_data)
+        self.save_drift_reference(reference, version)
+
+    def publish_version(self, version):
+        """
+        Make `version` current unless a newer version already is.
+
+        Compare-and-set under WATCH, so a slow load that finishes after a
+        newer one cannot move the pointer back. Returns (published, previous).
+        """
+
+        def flip(pipe):
+            previous = pipe.get(CURRENT_VERSION_KEY)
+            previous = int(previous) if previous is not None else None
+            if previous is not None and previous >= version:
+                return False, previous
+            pipe.multi()
+            pipe.set(CURRENT_VERSION_KEY, version)
+            pipe.sadd(PUBLISHED_VERSIONS_KEY, version)
+            return True, previous
+
+        return self.client.transaction(
+            flip, CURRENT_VERSION_KEY, value_from_callable=True
+        )
+
+    def stale_versions(self, current, keep=KEEP_VERSIONS):
+        """
+        Versions safe to delete: published ones older than the `keep` most
+        recent, and failed loads that stayed unpublished for ABANDONED_AFTER.
+        A version still being written is never returned.
+        """
+        published = set(map(int, self.client.smembers(PUBLISHED_VERSIONS_KEY)))
+        started = {
+            int(version): float(at)
+            for version, at in self.client.hgetall(VERSION_STARTED_KEY).items()
+        }
+        now = time.time()
+        stale = []
+        for version in map(int, self.client.smembers(VERSIONS_KEY)):
+            if version in published or version not in started:
+                # Versions written before publishing was recorded count as published
+                if version <= current - keep:
+                    stale.append(version)
+            elif now - started[version] > ABANDONED_AFTER:
+                stale.append(version)
+        return sorted(stale)
+
+    def delete_version(self, version):
+        entities_key = self._entities_key(version)
+        batch = []
+        for entity_id in self.client.sscan_iter(entities_key, count=BATCH_CHUNK_SIZE):
+            batch.append(self._key(entity_id, version))
+            if len(batch) >= BATCH_CHUNK_SIZE:
+                self.client.unlink(*batch)
+                batch = []
+        if batch:
+            self.client.unlink(*batch)
+        self.client.unlink(
+            entities_key, self._reference_key(version), self._pending_key(version)
+        )
+        pipe = self.client.pipeline(transaction=False)
+        pipe.srem(VERSIONS_KEY, version)
+        pipe.srem(PUBLISHED_VERSIONS_KEY, version)
+        pipe.hdel(VERSION_STARTED_KEY, version)
+        pipe.execute()
+
+    def delete_legacy_keys(self):
+        """Remove the unversioned `entity:*` keys left from before snapshots."""
+        deleted, batch = 0, []
+        for key in self.client.scan_iter(match=LEGACY_KEY_PATTERN, count=1000):
+            batch.append(key)
+            if len(batch) >= BATCH_CHUNK_SIZE:
+                deleted += self.client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.unlink(*batch)
+        if deleted:
+            logger.info(f"Deleted {deleted} unversioned feature keys")
+        return deleted
+
+    def garbage_collect(self, current=None, keep=KEEP_VERSIONS, legacy=False):
+        current = self.current_version() if current is None else current
+        stale = self.stale_versions(current, keep) if current is not None else []
+        for version in stale:
+            self.delete_version(version)
+        if legacy and current is not None:
+            self.delete_legacy_keys()
+        return stale
+
+    def _collect_garbage(self, current, legacy=False):
+        """
+        Collect old versions on a daemon thread, or inline when the store was
+        created with background_gc=False (short-lived jobs, whose daemon
+        threads would die with the process before finishing).
+        """
+        if self.background_gc:
+            threading.Thread(
+                target=self.garbage_collect,
+                args=(current,),
+                kwargs={"legacy": legacy},
+                daemon=True,
+            ).start()
+        else:
+            self.garbage_collect(current, legacy=legacy)
+
+    # === Drift Reference (bounded sample of each snapshot) ===
+    def get_drift_reference(self, version=None):
+        """The stored reference, including entities queued but not folded in."""
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self._reference_key(version))
+        pipe.lrange(self._pending_key(version), 0, -1)
+        value, pending = pipe.execute()
+        if not value:
+            return None
+        reference = DriftReference.from_json(value)
+        if pending:
+            reference.add_batch(dict(enumerate(map(json.loads, pending))))
+        return reference
+
+    def save_drift_reference(self, reference, version):
+        self.client.set(self._reference_key(version), reference.to_json())
+
+    def update_drift_reference(self, features, version):
+        """
+        Queue one new entity for the stored reference. An RPUSH never conflicts
+        with other writers; the writer whose push fills a batch folds it in.
+        """
+        queued = self.client.rpush(self._pending_key(version), json.dumps(features))
+        if queued % DRIFT_REFERENCE_FOLD_BATCH == 0:
+            self.fold_drift_reference(version)
+
+    def fold_drift_reference(self, version):
+        """Apply the queued entities to the stored reference (WATCH / retry)."""
+        key, pending_key = self._reference_key(version), self._pending_key(version)
+
+        def fold(pipe):
+            value = pipe.get(key)
+            pending = pipe.lrange(pending_key, 0, -1)
+            if not pending:
+                return
+            pipe.multi()
+            # Without a stored reference one is built on a scan, which
+            # includes these entities: just drop them
+            if value:
+                reference = DriftReference.from_json(value)
+                reference.add_batch(dict(enumerate(map(json.loads, pending))))
+                pipe.set(key, reference.to_json())
+            # Entities queued after the read stay for the next fold
+            pipe.ltrim(pending_key, len(pending), -1)
+
+        self.client.transaction(fold, key)
+
+    # === Feature Reads and Writes ===
+    def store_features(self, entity_id, features, version=None, update_reference=True):
+        """Store one entity in the current snapshot in place; True if it is new."""
+        version = self.current_version() if version is None else version
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key(entity_id, version), json.dumps(features))
+        if version is not None:
+            pipe.sadd(self._entities_key(version), entity_id)
+        results = pipe.execute()
+
+        # Updates of existing entities leave the reference sample alone
+        is_new = version is not None and bool(results[-1])
+        if is_new and update_reference:
+            self.update_drift_reference(features, version)
+        return is_new
+
+    def get_features(self, entity_id, version=None):
+        version = self.current_version() if version is None else version
+        features = self.client.get(self._key(entity_id, version))
+        return json.loads(features) if features else None
+
+    def store_batch_features(self, batch_data):
+        """
+        Bulk-load `batch_data` as a new snapshot and switch readers to it.
+
+        Writes go under a fresh version prefix, then a single pointer flip
+        makes them visible; old versions are removed in the background. A
+        failed load never becomes visible and is collected later. Returns
+        the new version, or None if a newer load was published first.
+        """
+        version = self.begin_version()
+        self.write_version(batch_data, version)
+        self.write_drift_reference(batch_data, version)
+        published, previous = self.publish_version(version)
+        if not published:
+            logger.warning(f"Snapshot v{version} superseded by v{previous}, dropped")
+            self.delete_version(version)
+            return None
+        # The first published snapshot replaces the unversioned layout
+        self._collect_garbage(version, legacy=previous is None)
+        return version
+
+    def get_batch_features(self, entity_ids, version=None):
+        # Resolve the snapshot once so the whole batch is consistent
+        version = self.current_version() if version is None else version
+        entity_ids = list(entity_ids)
+        results = {}
+        for start in range(0, len(entity_ids), BATCH_CHUNK_SIZE):
+            chunk = entity_ids[start : start + BATCH_CHUNK_SIZE]
+            values = self.client.mget([self._key(eid, version) for eid in chunk])
+            for eid, value in zip(chunk, values):
+                results[eid] = json.loads(value) if value else None
+        return results
+
+    def get_all_entity_ids(self, version=None):
+        version = self.current_version() if version is None else version
+        if version is None:
+            keys = self.client.scan_iter(match="entity:*:features", count=1000)
+            return [key.split(":")[1] for key in keys]
+        return list(
+            self.client.sscan_iter(self._entities_key(version), count=BATCH_CHUNK_SIZE)
+        )
+
+
+class HashRing:
+    """Consistent-hash ring mapping entity ids to shard indexes."""
+
+    def __init__(self, node_names, replicas=100):
+        self._ring = sorted(
+            (self._hash(f"{name}#{replica}"), index)
+            for index, name in enumerate(node_names)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(str(value).encode()).digest()[:8], "big")
+
+    def get_node(self, key):
+        position = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._ring[position][1]
+
+
+class ShardedRedisFeatureStore:
+    """
+    Feature store spread over several Redis nodes.
+
+    Entity ids are placed on shards with a consistent-hash ring, so adding a
+    node only moves a small share of the keys. Batch reads and writes are
+    grouped per shard and fanned out in parallel, then merged.
+    """
+
+    def __init__(self, redis_urls=None, shards=None, replicas=100, background_gc=True):
+        if shards is None:
+            redis_urls = redis_urls or [
+                url.strip()
+                for url in os.getenv("REDIS_SHARD_URLS", "").split(",")
+                if url.strip()
+            ]
+            if not redis_urls:
+                raise ValueError("No Redis shard URLs configured (REDIS_SHARD_URLS)")
+            shards = [
+                RedisFeatureStore(redis_url=url, background_gc=background_gc)
+                for url in redis_urls
+            ]
+
+        self.shards = list(shards)
+        self.ring = HashRing([shard.url for shard in self.shards], replicas)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.shards), thread_name_prefix="feature-shard"
+        )
+
+    def shard_for(self, entity_id):
+        return self.shards[self.ring.get_node(entity_id)]
+
+    def _group_by_shard(self, entity_ids):
+        groups = {}
+        for entity_id in entity_ids:
+            groups.setdefault(self.ring.get_node(entity_id), []).append(entity_id)
+        return groups
+
+    def _fan_out(self, calls):
+        """Run (method, args) calls concurrently and return their results."""
+        futures = [self._executor.submit(method, *args) for method, args in calls]
+        return [future.result() for future in futures]
+
+    # === Snapshot Versions (pointer and version sequence on the first shard) ===
+    @property
+    def coordinator(self):
+        return self.shards[0]
+
+    def current_version(self):
+        return self.coordinator.current_version()
+
+    def garbage_collect(self, current=None, keep=KEEP_VERSIONS, legacy=False):
+        current = self.current_version() if current is None else current
+        if current is None:
+            return []
+        stale = self.coordinator.stale_versions(current, keep)
+        for version in stale:
+            self._fan_out((shard.delete_version, (version,)) for shard in self.shards)
+        if legacy:
+            self._fan_out((shard.delete_legacy_keys, ()) for shard in self.shards)
+        return stale
+
+    # === Drift Reference (kept on the coordinator) ===
+    def get_drift_reference(self, version=None):
+        return self.coordinator.get_drift_reference(version)
+
+    def save_drift_reference(self, reference, version):
+        self.coordinator.save_drift_reference(reference, version)
+
+    # === Feature Reads and Writes ===
     def store_features(self, entity_id, features):
-        key = f"entity:{entity_id}:features"
-        self.client.set(key, json.dumps(features))
+        version = self.current_version()
+        is_new = self.shard_for(entity_id).store_features(
+            entity_id, features, version=version, update_reference=False
+        )
+        if is_new:
+            self.coordinator.update_drift_reference(features, version)
+        return is_new
 
     def get_features(self, entity_id):
-        key = f"entity:{entity_id}:features"
-        features = self.client.get(key)
-        return json.loads(features) if features else None
+        return self.shard_for(entity_id).get_features(
+            entity_id, version=self.current_version()
+        )
 
     def store_batch_features(self, batch_data):
-        for entity_id, features in batch_data.items():
-            self.store_features(entity_id, features)
+        """Write a new snapshot on every shard, then flip the shared pointer."""
+        version = self.coordinator.begin_version()
+        groups = self._group_by_shard(batch_data)
+        self._fan_out(
+            (
+                self.shards[index].write_version,
+                ({eid: batch_data[eid] for eid in entity_ids}, version),
+            )
+            for index, entity_ids in groups.items()
+        )
+        self.coordinator.write_drift_reference(batch_data, version)
+        published, previous = self.coordinator.publish_version(version)
+        if not published:
+            logger.warning(f"Snapshot v{version} superseded by v{previous}, dropped")
+            self._fan_out((shard.delete_version, (version,)) for shard in self.shards)
+            return None
+        legacy = previous is None
+        if self.coordinator.background_gc:
+            threading.Thread(
+                target=self.garbage_collect,
+                args=(version,),
+                kwargs={"legacy": legacy},
+                daemon=True,
+            ).start()
+        else:
+            self.garbage_collect(version, legacy=legacy)
+        return version
+
+    def get_batch_features(self, entity_ids, version=None):
+        # Resolve the snapshot once for all shards
+        version = self.current_version() if version is None else version
+        entity_ids = list(entity_ids)
+        groups = self._group_by_shard(entity_ids)
+        merged = {}
+        for part in self._fan_out(
+            (self.shards[index].get_batch_features, (ids, version))
+            for index, ids in groups.items()
+        ):
+            merged.update(part)
+        # Preserve the caller's ordering
+        return {eid: merged[eid] for eid in entity_ids}
+
+    def get_all_entity_ids(self, version=None):
+        version = self.current_version() if version is None else version
+        results = self._fan_out(
+            (shard.get_all_entity_ids, (version,)) for shard in self.shards
+        )
+        return [eid for ids in results for eid in ids]
+
+
+def get_feature_store(background_gc=True):
+    """
+    Feature store selected from the environment: the embedded local store
+    when FEATURE_STORE_BACKEND=local, a sharded store when REDIS_SHARD_URLS
+    is set, otherwise a single Redis.
 
-    def get_batch_features(self, entity_ids):
-        return {eid: self.get_features(eid) for eid in entity_ids}
+    Short-lived jobs pass background_gc=False so old snapshots are collected
+    before the load returns (the local store always collects inline).
+    """
+    if os.getenv("FEATURE_STORE_BACKEND", "redis").lower() == "local":
+        from src.local_feature_store import LocalFeatureStore
 
-    def get_all_entity_ids(self):
-        keys = self.client.keys("entity:*:features")
-        return [key.split(":")[1] for key in keys]
+        return LocalFeatureStore()
+    if os.getenv("REDIS_SHARD_URLS"):
+        return ShardedRedisFeatureStore(background_gc=background_gc)
+    return RedisFeatureStore(background_gc=background_gc)
@@ -0,0 +1,235 @@
+import json
+import math
+import os
+import re
+import sys
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# === Feature Columns Used by the Model (in model input order) ===
+FEATURE_NAMES = [
+    "Age",
+    "Fare",
+    "Pclass",
+    "Sex",
+    "Embarked",
+    "Familysize",
+    "Isalone",
+    "HasCabin",
+    "Title",
+    "Pclass_Fare",
+    "Age_Fare",
+]
+
+# Discrete features, tested for drift on category counts rather than K-S
+CATEGORICAL_FEATURES = ["Pclass", "Sex", "Embarked", "Title"]
+
+SEX_MAPPING = {"male": 0, "female": 1}
+TITLE_MAPPING = {"Mr": 0, "Miss": 1, "Mrs": 2, "Master": 3, "Rare": 4}
+RARE_TITLE = 4
+TITLE_PATTERN = re.compile(r" ([A-Za-z]+)\.")
+
+# Raw numeric fields; requests may send them as strings, as forms do
+NUMERIC_COLUMNS = ["Age", "Fare", "SibSp", "Parch", "Pclass"]
+
+
+def _is_missing(value):
+    """Return True for None, empty strings and NaN values in a raw record."""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    return isinstance(value, float) and math.isnan(value)
+
+
+class FeatureTransformer:
+    """
+    Fitted feature engineering shared by training, batch scoring and serving.
+
+    Stores the statistics learned on the training data (medians, modes and
+    category encodings) so raw passenger records are transformed exactly the
+    way the training set was.
+    """
+
+    def __init__(self):
+        self.age_median = None
+        self.fare_median = None
+        self.embarked_mode = None
+        self.embarked_categories = None
+        self._embarked_codes = {}
+
+    @property
+    def is_fitted(self):
+        return self.embarked_categories is not None
+
+    def fit(self, df):
+        """Learn fill values and encodings from a raw training DataFrame."""
+        try:
+            self.age_median = float(df["Age"].median())
+            self.fare_median = float(df["Fare"].median())
+            self.embarked_mode = str(df["Embarked"].mode()[0])
+
+            # Same ordering as `astype("category").cat.codes` after filling
+            embarked = df["Embarked"].fillna(self.embarked_mode)
+            self.embarked_categories = sorted(embarked.astype(str).unique())
+            self._embarked_codes = {
+                category: code for code, category in enumerate(self.embarked_categories)
+            }
+
+            logger.info("Feature transformer fitted.")
+            return self
+        except Exception as e:
+            logger.error(f"Error while fitting feature transformer: {e}")
+            raise CustomException(str(e), sys)
+
+    def transform(self, df):
+        """
+        Vectorized transform of a raw passenger DataFrame.
+
+        Returns a copy of `df` with cleaned and engineered columns added, so
+        identifiers and labels (PassengerId, Survived) are carried along.
+        """
+        # Imported here so the single-row serving path never loads pandas
+        import pandas as pd
+
+        try:
+            # Blank strings are missing and numeric strings are numbers, as
+            # `_is_missing` and `float()` treat them in transform_record
+            data = df.copy()
+            for column in data.select_dtypes(include=["object", "string"]):
+                blank = data[column].str.strip().eq("").fillna(False)
+                data[column] = data[column].mask(blank.astype(bool))
+            for column in NUMERIC_COLUMNS:
+                if column in data:
+                    data[column] = pd.to_numeric(data[column])
+
+            # Handle missing values with the fitted statistics
+            data["Age"] = data["Age"].fillna(self.age_median)
+            data["Fare"] = data["Fare"].fillna(self.fare_median)
+            data["SibSp"] = data["SibSp"].fillna(0)  # Same as transform_record
+            data["Parch"] = data["Parch"].fillna(0)
+            embarked = data["Embarked"].fillna(self.embarked_mode).astype(str)
+
+            # Encode categorical columns
+            data["Sex"] = data["Sex"].map(SEX_MAPPING)
+            data["Embarked"] = pd.Categorical(
+                embarked, categories=self.embarked_categories
+            ).codes
+
+            # Feature engineering
+            data["Familysize"] = data["SibSp"] + data["Parch"] + 1
+            data["Isalone"] = (data["Familysize"] == 1).astype(int)
+            data["HasCabin"] = data["Cabin"].notnull().astype(int)
+
+            # Extract and encode title from the Name field
+            data["Title"] = (
+                data["Name"]
+                .str.extract(TITLE_PATTERN.pattern, expand=False)
+                .map(TITLE_MAPPING)
+                .fillna(RARE_TITLE)
+            )
+
+            # Create interaction features
+            data["Pclass_Fare"] = data["Pclass"] * data["Fare"]
+            data["Age_Fare"] = data["Age"] * data["Fare"]
+
+            return data
+        except Exception as e:
+            logger.error(f"Error while transforming features: {e}")
+            raise CustomException(str(e), sys)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def transform_array(self, df):
+        """Transform a raw DataFrame into a float64 matrix in FEATURE_NAMES order."""
+        return self.transform(df)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+
+    def transform_record(self, record, out=None):
+        """
+        Fast path for a single raw passenger record (a dict or form mapping).
+
+        Fills `out` (or a new array) with the model features in FEATURE_NAMES
+        order without building a pandas DataFrame.
+        """
+        if out is None:
+            out = np.empty(len(FEATURE_NAMES), dtype=np.float64)
+
+        age = record.get("Age")
+        age = self.age_median if _is_missing(age) else float(age)
+        fare = record.get("Fare")
+        fare = self.fare_median if _is_missing(fare) else float(fare)
+        pclass = float(record["Pclass"])
+
+        sex = SEX_MAPPING.get(record.get("Sex"), math.nan)
+
+        embarked = record.get("Embarked")
+        embarked = self.embarked_mode if _is_missing(embarked) else str(embarked)
+        embarked = self._embarked_codes.get(embarked, -1)
+
+        # Missing SibSp / Parch count as 0, as in the batch transform
+        sibsp, parch = record.get("SibSp"), record.get("Parch")
+        familysize = (
+            (0.0 if _is_missing(sibsp) else float(sibsp))
+            + (0.0 if _is_missing(parch) else float(parch))
+            + 1
+        )
+
+        match = TITLE_PATTERN.search(record.get("Name") or "")
+        title = TITLE_MAPPING.get(match.group(1), RARE_TITLE) if match else RARE_TITLE
+
+        out[0] = age
+        out[1] = fare
+        out[2] = pclass
+        out[3] = sex
+        out[4] = embarked
+        out[5] = familysize
+        out[6] = 1.0 if familysize == 1 else 0.0
+        out[7] = 0.0 if _is_missing(record.get("Cabin")) else 1.0
+        out[8] = title
+        out[9] = pclass * fare
+        out[10] = age * fare
+        return out
+
+    def to_dict(self):
+        return {
+            "age_median": self.age_median,
+            "fare_median": self.fare_median,
+            "embarked_mode": self.embarked_mode,
+            "embarked_categories": self.embarked_categories,
+            "feature_names": FEATURE_NAMES,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        transformer = cls()
+        transformer.age_median = state["age_median"]
+        transformer.fare_median = state["fare_median"]
+        transformer.embarked_mode = state["embarked_mode"]
+        transformer.embarked_categories = list(state["embarked_categories"])
+        transformer._embarked_codes = {
+            category: code
+            for code, category in enumerate(transformer.embarked_categories)
+        }
+        return transformer
+
+    def save(self, path):
+        """Save the fitted statistics as JSON next to the model artifact."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(tmp_path, path)
+            logger.info(f"Feature transformer saved at {path}")
+        except Exception as e:
+            logger.error(f"Error while saving feature transformer: {e}")
+            raise CustomException(str(e), sys)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
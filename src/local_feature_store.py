@@ -0,0 +1,309 @@
+import argparse
+import errno
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from src.drift_reference import DriftReference
+from src.logger import get_logger
+from config.paths_config import FEATURE_STORE_DIR
+
+logger = get_logger(__name__)
+
+LOCAL_FEATURE_STORE_DIR = os.getenv("LOCAL_FEATURE_STORE_DIR", FEATURE_STORE_DIR)
+KEEP_VERSIONS = int(os.getenv("FEATURE_STORE_KEEP_VERSIONS", 2))
+# Temporary snapshot directories older than this are left over from failed writers
+ABANDONED_AFTER = float(os.getenv("FEATURE_STORE_ABANDONED_AFTER", 24 * 3600))
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+TMP_PREFIX = ".tmp-"
+REFERENCE_FILE = "drift_reference.json"
+# Columns stored as float64 in the matrix but returned as ints, like Redis
+INTEGER_COLUMNS = {"Survived"}
+
+# Entities per read from Redis while syncing
+SYNC_CHUNK_SIZE = 10000
+
+
+class LocalFeatureStore:
+    """
+    Embedded, memory-mapped feature store for offline and batch jobs.
+
+    Same interface as RedisFeatureStore, backed by versioned snapshot
+    directories holding a float64 `features.npy` matrix (one row per entity)
+    and an `ids.npy` index. Snapshots are opened with `mmap_mode="r"`, so
+    training reads features straight from the page cache instead of over
+    the network. A `CURRENT` file, replaced atomically, names the live
+    snapshot, mirroring the Redis version pointer. Snapshots are immutable
+    once published, and several processes may write to the same root.
+    """
+
+    def __init__(self, root_dir=LOCAL_FEATURE_STORE_DIR):
+        self.root_dir = root_dir
+        self.url = f"file://{os.path.abspath(root_dir)}"
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _version_dir(self, version):
+        return os.path.join(self.root_dir, f"v{version}")
+
+    # === Snapshot Versions ===
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root_dir, CURRENT_FILE)) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def _versions(self):
+        return sorted(
+            int(name[1:])
+            for name in os.listdir(self.root_dir)
+            if name.startswith("v") and name[1:].isdigit()
+        )
+
+    def _snapshot(self, version=None):
+        """(ids, id -> row index, memmapped matrix, columns) for a version."""
+        version = self.current_version() if version is None else version
+        if version is None:
+            return np.array([], dtype=str), {}, np.empty((0, 0)), []
+
+        with self._lock:
+            snapshot = self._cache.get(version)
+            if snapshot is None:
+                path = self._version_dir(version)
+                with open(os.path.join(path, "meta.json")) as f:
+                    columns = json.load(f)["columns"]
+                ids = np.load(os.path.join(path, "ids.npy"))
+                matrix = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+                index = {eid: row for row, eid in enumerate(ids.tolist())}
+                snapshot = self._cache[version] = (ids, index, matrix, columns)
+            return snapshot
+
+    def write_snapshot(self, entity_ids, matrix, columns):
+        """
+        Write a new snapshot and make it current; safe across processes.
+
+        Files are written to a private temporary directory, which then claims
+        the next version number with an atomic rename (retrying if another
+        writer took it). CURRENT only moves forward: a writer that loses to a
+        newer snapshot drops its own and returns None.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self.root_dir)
+        os.chmod(tmp_dir, 0o755)  # mkdtemp's 0o700 would hide it from other users
+        try:
+            np.save(os.path.join(tmp_dir, "ids.npy"), np.asarray(entity_ids, dtype=str))
+            np.save(
+                os.path.join(tmp_dir, "features.npy"),
+                np.ascontiguousarray(matrix, dtype=np.float64),
+            )
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump({"columns": list(columns)}, f)
+            reference = DriftReference()
+            reference.add_matrix(matrix, list(columns))
+            with open(os.path.join(tmp_dir, REFERENCE_FILE), "w") as f:
+                f.write(reference.to_json())
+            version = self._claim_version(tmp_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if not self._publish(version):
+            logger.warning(f"Local snapshot v{version} superseded, dropped")
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
+            return None
+
+        self.garbage_collect(version)
+        logger.info(f"Local feature snapshot v{version} written ({len(matrix)} rows)")
+        return version
+
+    def _claim_version(self, tmp_dir):
+        while True:
+            versions = self._versions()
+            version = (versions[-1] if versions else 0) + 1
+            try:
+                # Fails if the directory exists (and is not empty), so two
+                # writers can never end up with the same version
+                os.rename(tmp_dir, self._version_dir(version))
+                return version
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+
+    def _publish(self, version):
+        """Point CURRENT at `version` unless a newer version already is current."""
+        with open(os.path.join(self.root_dir, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file closes
+            current = self.current_version()
+            if current is not None and current >= version:
+                return False
+            current_tmp = os.path.join(self.root_dir, f"{CURRENT_FILE}.tmp")
+            with open(current_tmp, "w") as f:
+                f.write(str(version))
+            os.replace(current_tmp, os.path.join(self.root_dir, CURRENT_FILE))
+            return True
+
+    def garbage_collect(self, current=None, keep=KEEP_VERSIONS):
+        current = self.current_version() if current is None else current
+        stale = [v for v in self._versions() if current and v <= current - keep]
+        for version in stale:
+            with self._lock:
+                self._cache.pop(version, None)
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+        # Temporary directories of writers that died before claiming a version
+        for name in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, name)
+            if name.startswith(TMP_PREFIX):
+                try:
+                    abandoned = time.time() - os.path.getmtime(path) > ABANDONED_AFTER
+                except FileNotFoundError:
+                    continue
+                if abandoned:
+                    shutil.rmtree(path, ignore_errors=True)
+        return stale
+
+    # === Drift Reference (bounded sample written with each snapshot) ===
+    def get_drift_reference(self, version=None):
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(self._version_dir(version), REFERENCE_FILE)) as f:
+                return DriftReference.from_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save_drift_reference(self, reference, version):
+        path = os.path.join(self._version_dir(version), REFERENCE_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(reference.to_json())
+        os.replace(f"{path}.tmp", path)
+
+    # === Feature Reads and Writes (RedisFeatureStore interface) ===
+    @staticmethod
+    def _row_to_dict(row, columns):
+        return {
+            column: (
+                int(value)
+                if column in INTEGER_COLUMNS and not np.isnan(value)
+                else float(value)
+            )
+            for column, value in zip(columns, row)
+        }
+
+    def store_features(self, entity_id, features):
+        """
+        Store one entity by writing a new snapshot with it added or updated;
+        True if it is new, as with RedisFeatureStore.
+
+        Published snapshots are never modified, so readers pinned to a version
+        never see a partly written row; each call copies the whole matrix,
+        which suits the offline jobs this store is for, not per-request writes.
+        """
+        ids, index, matrix, columns = self._snapshot()
+        row = index.get(str(entity_id))
+        if row is not None and set(features) <= set(columns):
+            updated = np.array(matrix, dtype=np.float64)
+            for column, value in features.items():
+                updated[row, columns.index(column)] = value
+            self.write_snapshot(ids, updated, columns)
+            return False
+
+        # New entity (or new columns): rebuild the rows with the new column set
+        batch = {
+            eid: self._row_to_dict(matrix[i], columns) for i, eid in enumerate(ids)
+        }
+        batch[str(entity_id)] = features
+        self.store_batch_features(batch)
+        return row is None
+
+    def get_features(self, entity_id, version=None):
+        _, index, matrix, columns = self._snapshot(version)
+        row = index.get(str(entity_id))
+        return self._row_to_dict(matrix[row], columns) if row is not None else None
+
+    def store_batch_features(self, batch_data):
+        columns = []
+        for features in batch_data.values():
+            columns.extend(c for c in features if c not in columns)
+        matrix = np.array(
+            [
+                [features.get(column, np.nan) for column in columns]
+                for features in batch_data.values()
+            ],
+            dtype=np.float64,
+        ).reshape(len(batch_data), len(columns))
+        return self.write_snapshot([str(eid) for eid in batch_data], matrix, columns)
+
+    def get_batch_features(self, entity_ids, version=None):
+        _, index, matrix, columns = self._snapshot(version)
+        entity_ids = list(entity_ids)
+        rows = [index.get(str(eid)) for eid in entity_ids]
+        found = [row for row in rows if row is not None]
+        values = iter(matrix[found]) if found else iter(())
+        return {
+            eid: self._row_to_dict(next(values), columns) if row is not None else None
+            for eid, row in zip(entity_ids, rows)
+        }
+
+    def get_all_entity_ids(self, version=None):
+        return self._snapshot(version)[0].tolist()
+
+    def get_feature_matrix(self, version=None):
+        """(entity ids, memory-mapped feature matrix, column names) in one call."""
+        ids, _, matrix, columns = self._snapshot(version)
+        return ids, matrix, columns
+
+
+def sync_from_redis(source, local_store, chunk_size=SYNC_CHUNK_SIZE):
+    """
+    Copy the current snapshot of a Redis feature store into `local_store`.
+
+    Reads one pinned source version in chunks and publishes it locally as a
+    single new snapshot; returns (source version, local version).
+    """
+    version = source.current_version()
+    entity_ids = source.get_all_entity_ids(version)
+
+    columns, rows, ids = None, [], []
+    for start in range(0, len(entity_ids), chunk_size):
+        chunk = source.get_batch_features(
+            entity_ids[start : start + chunk_size], version
+        )
+        for eid, features in chunk.items():
+            if not features:
+                continue
+            columns = columns or list(features)
+            rows.append([features.get(column, np.nan) for column in columns])
+            ids.append(str(eid))
+
+    matrix = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(columns or []))
+    local_version = local_store.write_snapshot(ids, matrix, columns or [])
+    logger.info(
+        f"Synced {len(ids)} entities from Redis v{version} to local v{local_version}"
+    )
+    return version, local_version
+
+
+if __name__ == "__main__":
+    from src.feature_store import RedisFeatureStore, ShardedRedisFeatureStore
+
+    parser = argparse.ArgumentParser(
+        description="Sync the Redis feature store into the local embedded store."
+    )
+    parser.add_argument("--dir", default=LOCAL_FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    # Always sync from Redis, even when FEATURE_STORE_BACKEND=local
+    source = (
+        ShardedRedisFeatureStore()
+        if os.getenv("REDIS_SHARD_URLS")
+        else RedisFeatureStore()
+    )
+    print(sync_from_redis(source, LocalFeatureStore(args.dir)))
@@ -1,20 +1,145 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 from datetime import datetime
 
-LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR, exist_ok=True)
+LOGS_DIR = os.getenv("LOGS_DIR", "logs")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
+# Fraction of per-request messages (logged with extra=SAMPLED) that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+SAMPLED = {"sampled": True}
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class DailyFileHandler(logging.FileHandler):
+    """Appends to `log_YYYY-MM-DD.log`, switching files when the day changes."""
+
+    def __init__(self, log_dir=LOGS_DIR):
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        self.day = self._today()
+        super().__init__(self._path(self.day), delay=True)
+
+    @staticmethod
+    def _today():
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def _path(self, day):
+        return os.path.abspath(os.path.join(self.log_dir, f"log_{day}.log"))
+
+    def emit(self, record):
+        day = self._today()
+        if day != self.day:
+            self.close()
+            self.day = day
+            self.baseFilename = self._path(day)
+        super().emit(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key != "sampled"
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=_json_default)
+
+
+def _json_default(value):
+    # numpy arrays and scalars, then anything else as text
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a `rate` fraction of records flagged with extra=SAMPLED."""
+
+    def __init__(self, rate=LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sampled", False) and self.rate < 1:
+            return random.random() < self.rate
+        return True
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback out of the message text."""
+
+    def prepare(self, record):
+        # Resolve the message and traceback now: args and exc_info may not
+        # be safe to use later on the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+# === Asynchronous Setup: Callers Enqueue, a Listener Thread Writes ===
+_queue_handler = None
+_listener = None
+
+
+def _start_listener():
+    global _queue_handler, _listener
+    log_queue = queue.SimpleQueue()
+    file_handler = DailyFileHandler()
+    file_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    _queue_handler = StructuredQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter())
+    root.addHandler(_queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def _stop_listener():
+    # Drains the queue, so records logged just before exit are written
+    if _listener is not None:
+        _listener.stop()
+
+
+_start_listener()
+atexit.register(_stop_listener)
+# A forked child (multiprocessing, ProcessPoolExecutor) has no listener thread
+os.register_at_fork(after_in_child=_start_listener)
 
 
 def get_logger(name):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     return logger
@@ -0,0 +1,290 @@
+"""
+Flat, memory-mappable file format for fitted random forests.
+
+Layout (all offsets from the start of the file)::
+
+    MAGIC (8 bytes) | format version (uint32) | header length (uint32)
+    JSON header: schema (features, classes), sklearn version, array table
+    arrays, each aligned to ARRAY_ALIGNMENT bytes
+
+The node arrays of every tree are concatenated with global node indices,
+so loading is a handful of `np.memmap` calls instead of unpickling one
+Python object per tree, and worker processes share the page cache.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+MAGIC = b"SFFOREST"
+FORMAT_VERSION = 2  # 2: adds missing_go_to_left (NaN routing per split)
+ARRAY_ALIGNMENT = 64
+PREFIX = struct.Struct("<8sII")
+
+# Rows traversed per block; bounds the (rows x trees) index arrays
+PREDICT_BLOCK_ROWS = 4096
+
+
+def atomic_write(path, write):
+    """
+    Write a file via a temp file in the same directory and os.replace, so
+    readers see either the old or the new file, never a partial one.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates files readable by owner only
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _flatten(model):
+    """Concatenate every tree's nodes, with leaves pointing at themselves."""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    n_classes = len(model.classes_)
+
+    left, right, feature, threshold, value, missing_left = [], [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+        right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        # Where sklearn sends NaN at each split (trees from before sklearn
+        # supported missing values have none: NaN fails `<=` and goes right)
+        missing = getattr(tree, "missing_go_to_left", None)
+        missing_left.append(
+            np.zeros(tree.node_count, dtype=bool)
+            if missing is None
+            else np.asarray(missing, dtype=bool) & ~is_leaf
+        )
+        # Older artifacts store class counts rather than fractions
+        node_value = tree.value[:, 0, :n_classes]
+        value.append(node_value / node_value.sum(axis=1, keepdims=True))
+
+    return {
+        "roots": offsets[:-1].astype(np.int32),
+        "children_left": np.concatenate(left).astype(np.int32),
+        "children_right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "missing_go_to_left": np.concatenate(missing_left).astype(np.uint8),
+    }
+
+
+def save_forest(model, path):
+    """Write a fitted RandomForestClassifier in the flat format (atomically)."""
+    try:
+        import sklearn
+
+        arrays = _flatten(model)
+        header = {
+            "model_class": type(model).__name__,
+            "sklearn_version": sklearn.__version__,
+            "schema": {
+                "n_features": int(model.n_features_in_),
+                "feature_names": [
+                    str(name) for name in getattr(model, "feature_names_in_", [])
+                ],
+                "classes": model.classes_.tolist(),
+            },
+            "n_trees": len(model.estimators_),
+            "max_depth": max(e.tree_.max_depth for e in model.estimators_),
+            "arrays": {},
+        }
+
+        # The header holds the array offsets, so size it with placeholder
+        # offsets first; widths never grow once offsets are filled in
+        for name, array in arrays.items():
+            header["arrays"][name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": 10**12,
+            }
+        header_size = len(json.dumps(header).encode())
+        offset = -(-(PREFIX.size + header_size) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        for name, array in arrays.items():
+            header["arrays"][name]["offset"] = offset
+            offset += -(-array.nbytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        header_bytes = json.dumps(header).encode()
+
+        def write(f):
+            f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+
+        atomic_write(path, write)
+        logger.info(f"Flat forest ({header['n_trees']} trees) saved at {path}")
+    except Exception as e:
+        logger.error(f"Error while saving flat forest: {e}")
+        raise CustomException(str(e), sys)
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a flat forest file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported flat forest format version {version}")
+        return json.loads(f.read(header_length))
+
+
+class FlatForest:
+    """
+    A forest loaded from the flat format, scoring all trees at once.
+
+    Each traversal step advances every (row, tree) pair one level with
+    vectorized gathers: float32 inputs are compared against the split
+    thresholds exactly as sklearn's trees do, NaN follows each split's
+    `missing_go_to_left`, and leaves loop onto themselves, so `max_depth`
+    steps reach every leaf.
+    """
+
+    def __init__(self, header, arrays):
+        self.header = header
+        schema = header["schema"]
+        self.classes_ = np.asarray(schema["classes"])
+        self.n_features_in_ = schema["n_features"]
+        if schema["feature_names"]:
+            self.feature_names_in_ = np.asarray(schema["feature_names"], dtype=object)
+        self.max_depth = header["max_depth"]
+        # Version 1 files predate NaN routing: NaN always went right
+        self.missing_go_to_left = None
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        if self.missing_go_to_left is not None:
+            self.missing_go_to_left = self.missing_go_to_left.astype(bool)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        header = read_header(path)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            if mmap:
+                # Plain ndarray views of the mapping (np.memmap indexing is slower)
+                arrays[name] = np.asarray(
+                    np.memmap(
+                        path,
+                        dtype=np.dtype(spec["dtype"]),
+                        mode="r",
+                        offset=spec["offset"],
+                        shape=tuple(spec["shape"]),
+                    )
+                )
+            else:
+                with open(path, "rb") as f:
+                    f.seek(spec["offset"])
+                    arrays[name] = np.fromfile(
+                        f,
+                        dtype=np.dtype(spec["dtype"]),
+                        count=int(np.prod(spec["shape"])),
+                    ).reshape(spec["shape"])
+        return cls(header, arrays)
+
+    def _leaves(self, X):
+        """Leaf index of every (row, tree) pair for a C-contiguous float32 X."""
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        nodes = np.tile(self.roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows) * n_features, n_trees)
+        values = X.ravel()
+        missing_left = self.missing_go_to_left if np.isnan(values).any() else None
+
+        # Only pairs that moved last step are still active
+        active = np.arange(len(nodes))
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            x = values.take(row_base[active] + self.feature.take(current))
+            go_left = x <= self.threshold.take(current)
+            if missing_left is not None:
+                missing = np.isnan(x)
+                if missing.any():
+                    go_left[missing] = missing_left.take(current[missing])
+            moved = np.where(
+                go_left,
+                self.children_left.take(current),
+                self.children_right.take(current),
+            )
+            nodes[active] = moved
+            active = active[moved != current]
+            if not len(active):
+                break
+        return nodes.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the forest expects "
+                f"{self.n_features_in_}"
+            )
+
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], PREDICT_BLOCK_ROWS):
+            block = X[start : start + PREDICT_BLOCK_ROWS]
+            proba[start : start + len(block)] = self.value[self._leaves(block)].mean(
+                axis=1
+            )
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def save_joblib(model, path):
+    """Uncompressed joblib dump, so `load_joblib` can memory-map its arrays."""
+    import joblib
+
+    atomic_write(path, lambda f: joblib.dump(model, f))
+
+
+def load_joblib(path, mmap=True):
+    import joblib
+
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def load_model(path):
+    """Load a model file in either format, detected from its first bytes."""
+    with open(path, "rb") as f:
+        is_flat = f.read(len(MAGIC)) == MAGIC
+    if is_flat:
+        return FlatForest.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a pickled forest into the flat format."
+    )
+    parser.add_argument("model", help="Pickled RandomForestClassifier")
+    parser.add_argument("--output", help="Defaults to <model>.forest")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        model = pickle.load(f)
+    save_forest(model, args.output or os.path.splitext(args.model)[0] + ".forest")
@@ -0,0 +1,266 @@
+import contextlib
+import fcntl
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from src.fast_inference import ForestPredictor
+from src.feature_transformer import FEATURE_NAMES, FeatureTransformer
+from src.model_format import FlatForest, atomic_write, save_forest
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import MODEL_REGISTRY_DIR
+
+logger = get_logger(__name__)
+
+LATEST_FILE = "LATEST"
+MODEL_FILE = "model.pkl"
+FLAT_MODEL_FILE = "model.forest"
+METADATA_FILE = "metadata.json"
+TRANSFORMER_FILE = "feature_transformer.json"
+LOCK_FILE = ".lock"
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts on disk.
+
+    Each registered model gets its own `v{N}/` directory (pickled model,
+    flat forest file when possible, the feature transformer it was trained
+    with, metadata), renamed into place once complete. A `LATEST` file,
+    replaced atomically, points at the version to serve. With
+    `model_format="flat"`, `load` memory-maps the flat file.
+    """
+
+    def __init__(self, root_dir=MODEL_REGISTRY_DIR, model_format="pickle"):
+        self.root_dir = root_dir
+        self.model_format = model_format
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _version_dir(self, version):
+        return os.path.join(self.root_dir, f"v{version}")
+
+    def versions(self):
+        return sorted(
+            int(name[1:])
+            for name in os.listdir(self.root_dir)
+            if name.startswith("v") and name[1:].isdigit()
+        )
+
+    def latest_version(self):
+        try:
+            with open(os.path.join(self.root_dir, LATEST_FILE)) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def model_path(self, version=None):
+        version = self.latest_version() if version is None else version
+        return os.path.join(self._version_dir(version), MODEL_FILE)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive lock across processes for version allocation and LATEST."""
+        with open(os.path.join(self.root_dir, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file closes
+            yield
+
+    def register(self, model, metadata=None, promote=True, transformer=None):
+        """
+        Save `model` (and the FeatureTransformer it was trained with) as a new
+        version and, by default, point LATEST at it.
+        """
+        tmp_dir = tempfile.mkdtemp(dir=self.root_dir, prefix=".tmp-")
+        try:
+            with open(os.path.join(tmp_dir, MODEL_FILE), "wb") as f:
+                pickle.dump(model, f)
+            if hasattr(model, "estimators_"):
+                save_forest(model, os.path.join(tmp_dir, FLAT_MODEL_FILE))
+            if transformer is not None:
+                transformer.save(os.path.join(tmp_dir, TRANSFORMER_FILE))
+
+            # Two registrations at once must never pick the same version
+            with self._locked():
+                versions = self.versions()
+                version = (versions[-1] if versions else 0) + 1
+                with open(os.path.join(tmp_dir, METADATA_FILE), "w") as f:
+                    json.dump(
+                        {
+                            "version": version,
+                            "created_at": time.time(),
+                            **(metadata or {}),
+                        },
+                        f,
+                    )
+                os.chmod(tmp_dir, 0o755)  # mkdtemp's 0o700 would hide it
+                os.rename(tmp_dir, self._version_dir(version))
+
+                if promote:
+                    self._write_latest(version)
+            logger.info(f"Registered model version {version}")
+            return version
+        except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            logger.error(f"Error while registering model: {e}")
+            raise CustomException(str(e), sys)
+
+    def promote(self, version):
+        """Atomically point LATEST at an existing version."""
+        if not os.path.isdir(self._version_dir(version)):
+            raise ValueError(f"Model version {version} does not exist")
+        with self._locked():
+            self._write_latest(version)
+
+    def _write_latest(self, version):
+        atomic_write(
+            os.path.join(self.root_dir, LATEST_FILE),
+            lambda f: f.write(str(version).encode()),
+        )
+
+    def metadata(self, version=None):
+        version = self.latest_version() if version is None else version
+        with open(os.path.join(self._version_dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def load(self, version=None):
+        """(version, model) for `version`, or the LATEST one."""
+        version = self.latest_version() if version is None else version
+        if version is None:
+            raise FileNotFoundError(f"No model registered in {self.root_dir}")
+
+        flat_path = os.path.join(self._version_dir(version), FLAT_MODEL_FILE)
+        if self.model_format == "flat" and os.path.exists(flat_path):
+            return version, FlatForest.load(flat_path)
+        with open(self.model_path(version), "rb") as f:
+            return version, pickle.load(f)
+
+    def transformer_path(self, version=None):
+        version = self.latest_version() if version is None else version
+        return os.path.join(self._version_dir(version), TRANSFORMER_FILE)
+
+    def load_transformer(self, version=None):
+        """The version's FeatureTransformer, or None if it was registered without one."""
+        path = self.transformer_path(version)
+        return FeatureTransformer.load(path) if os.path.exists(path) else None
+
+
+# A model ready to serve, with the transformer that encodes its inputs;
+# swapped as one object so a request never mixes two versions
+ServingModel = namedtuple(
+    "ServingModel",
+    ["version", "model", "predictor", "transformer"],
+    defaults=(None,),
+)
+
+
+def warm_up(model, rows, feature_names=FEATURE_NAMES):
+    """
+    Build the serving predictor and run sample rows through it once.
+
+    `rows` are in `feature_names` order, as the request path fills them.
+    """
+    # The fast path skips sklearn's input validation, so check the schema here
+    n_features = getattr(model, "n_features_in_", rows.shape[1])
+    if n_features != rows.shape[1]:
+        raise ValueError(f"Model expects {n_features} features, got {rows.shape[1]}")
+    # Same columns in another order would score silently wrong
+    model_names = getattr(model, "feature_names_in_", None)
+    if model_names is not None and list(model_names) != list(feature_names):
+        raise ValueError(
+            f"Model expects features {list(model_names)}, "
+            f"serving fills {list(feature_names)}"
+        )
+
+    predictor = ForestPredictor(model)
+    proba = predictor.predict_proba(rows)
+    if (
+        proba.shape != (len(rows), len(predictor.classes_))
+        or not np.isfinite(proba).all()
+    ):
+        raise ValueError("Warm-up produced invalid probabilities")
+    return predictor
+
+
+class ModelHolder:
+    """Holds the serving model; readers take `.current` once per request."""
+
+    def __init__(self, serving_model):
+        self._current = serving_model
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return self._current
+
+    def swap(self, serving_model):
+        # Writers (warm-up, watcher) take the lock; readers need none, since
+        # the model and its transformer change in one reference assignment
+        # and in-flight requests keep the old pair
+        with self._lock:
+            self._current = serving_model
+
+
+class ModelWatcher:
+    """
+    Background thread that polls the registry and hot-swaps new versions.
+
+    Loading, validation and warm-up all happen on the watcher thread; the
+    request path only ever sees a fully warmed model.
+    """
+
+    def __init__(self, registry, holder, warmup_rows, interval=30, on_swap=None):
+        self.registry = registry
+        self.holder = holder
+        self.warmup_rows = warmup_rows
+        self.interval = interval
+        self.on_swap = on_swap
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Load and swap in the LATEST version if it is new; returns True on swap."""
+        version = self.registry.latest_version()
+        if version in (None, self.holder.current.version, self._failed_version):
+            return False
+
+        try:
+            version, model = self.registry.load(version)
+            transformer = self.registry.load_transformer(version)
+            predictor = warm_up(model, self.warmup_rows())
+        except Exception as e:
+            self._failed_version = version  # Don't retry until LATEST moves
+            logger.error(
+                f"Model version {version} failed to load, keeping current: {e}"
+            )
+            return False
+
+        if transformer is None:
+            # Registered before transformers were versioned with the model
+            logger.warning(f"Model version {version} has no transformer, keeping it")
+            transformer = self.holder.current.transformer
+        self.holder.swap(ServingModel(version, model, predictor, transformer))
+        logger.info(f"Swapped in model version {version}")
+        if self.on_swap is not None:
+            self.on_swap(version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="model-watcher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -1,19 +1,39 @@
 from src.logger import get_logger
 from src.custom_exception import CustomException
 import pandas as pd
-from src.feature_store import RedisFeatureStore
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from src.feature_store import RedisFeatureStore, get_feature_store
+from src.feature_transformer import FeatureTransformer
+from src.model_format import atomic_write, save_forest
+from src.model_registry import ModelRegistry
+from sklearn.model_selection import (
+    train_test_split,
+    RandomizedSearchCV,
+    cross_val_score,
+)
 from sklearn.ensemble import RandomForestClassifier
 import os
 import pickle
+import sys
 from sklearn.metrics import accuracy_score
+from config.paths_config import MODEL_DIR
 
 logger = get_logger(__name__)
 
+# Search space for RandomizedSearchCV (and for fanned-out candidates)
+PARAM_DISTRIBUTIONS = {
+    "n_estimators": [100, 200, 300],
+    "max_depth": [10, 20, 30],
+    "min_samples_split": [2, 5],
+    "min_samples_leaf": [1, 2],
+}
+
 
 class ModelTraining:
     def __init__(
-        self, feature_store: RedisFeatureStore, model_save_path="artifacts/models/"
+        self,
+        feature_store: RedisFeatureStore,
+        model_save_path=MODEL_DIR + os.sep,
+        registry: ModelRegistry = None,
     ):
         # Initialize Redis feature store and model path
         self.feature_store = feature_store
@@ -22,22 +42,25 @@ class ModelTraining:
 
         # Create directory to save model if it doesn't exist
         os.makedirs(self.model_save_path, exist_ok=True)
+
+        # Versioned models live in a registry next to the legacy .pkl
+        self.registry = registry or ModelRegistry(
+            os.path.join(self.model_save_path, "registry")
+        )
         logger.info("Model Training initialized...")
 
-    def load_data_from_redis(self, entity_ids):
+    def load_data_from_redis(self, entity_ids, version=None):
         """
         Load feature data from Redis using a list of entity IDs.
         """
         try:
             logger.info("Extracting data from Redis")
 
-            data = []
-            for entity_id in entity_ids:
-                features = self.feature_store.get_features(entity_id)
-                if features:
-                    data.append(features)
-                else:
-                    logger.warning("Feature not found")
+            # One batched read (fanned out per shard when sharded)
+            batch = self.feature_store.get_batch_features(entity_ids, version=version)
+            data = [features for features in batch.values() if features]
+            if len(data) < len(batch):
+                logger.warning(f"Features not found for {len(batch) - len(data)} ids")
             return data
         except Exception as e:
             logger.error(f"Error while loading data from Redis: {e}")
@@ -48,8 +71,15 @@ class ModelTraining:
         Prepare training and testing data from Redis.
         """
         try:
+            # Pin one feature snapshot so a concurrent reload can't mix data
+            version = self.feature_store.current_version()
+
+            # Local store: slice the memory-mapped matrix directly
+            if hasattr(self.feature_store, "get_feature_matrix"):
+                return self.prepare_data_from_matrix(version)
+
             # Get all entity IDs from Redis
-            entity_ids = self.feature_store.get_all_entity_ids()
+            entity_ids = self.feature_store.get_all_entity_ids(version=version)
 
             # Split into train and test IDs
             train_entity_ids, test_entity_ids = train_test_split(
@@ -57,8 +87,8 @@ class ModelTraining:
             )
 
             # Load data from Redis
-            train_data = self.load_data_from_redis(train_entity_ids)
-            test_data = self.load_data_from_redis(test_entity_ids)
+            train_data = self.load_data_from_redis(train_entity_ids, version)
+            test_data = self.load_data_from_redis(test_entity_ids, version)
 
             # Convert to DataFrame
             train_df = pd.DataFrame(train_data)
@@ -78,22 +108,57 @@ class ModelTraining:
             logger.error(f"Error while preparing data: {e}")
             raise CustomException(str(e))
 
+    @staticmethod
+    def split_frame(df):
+        """
+        Seeded 80/20 split of a feature frame's rows, in the frame's order.
+
+        Not the same rows as the Redis path, which splits the entity ids in
+        the order the store returns them.
+        """
+        train_idx, test_idx = train_test_split(
+            range(len(df)), test_size=0.2, random_state=42
+        )
+        train_df, test_df = df.iloc[train_idx], df.iloc[test_idx]
+
+        X_train = train_df.drop("Survived", axis=1)
+        X_test = test_df.drop("Survived", axis=1)
+        y_train = train_df["Survived"].astype(int)
+        y_test = test_df["Survived"].astype(int)
+        return X_train, X_test, y_train, y_test
+
+    def prepare_data_from_matrix(self, version=None):
+        """
+        Prepare training and testing data from the local feature matrix,
+        without building per-entity dicts.
+        """
+        _, matrix, columns = self.feature_store.get_feature_matrix(version)
+        data = self.split_frame(pd.DataFrame(matrix, columns=columns))
+        logger.info("Preparation for Model Training completed (local store)")
+        return data
+
+    def prepare_data_from_parquet(self, path):
+        """
+        Prepare training and testing data from the processed Parquet artifact.
+        """
+        try:
+            df = pd.read_parquet(path).drop(columns="PassengerId")
+            data = self.split_frame(df)
+            logger.info(f"Preparation for Model Training completed ({path})")
+            return data
+        except Exception as e:
+            logger.error(f"Error while preparing data from Parquet: {e}")
+            raise CustomException(str(e), sys)
+
     def hyperparamter_tuning(self, X_train, y_train):
         """
         Perform hyperparameter tuning using RandomizedSearchCV.
         """
         try:
-            param_distributions = {
-                "n_estimators": [100, 200, 300],
-                "max_depth": [10, 20, 30],
-                "min_samples_split": [2, 5],
-                "min_samples_leaf": [1, 2],
-            }
-
             rf = RandomForestClassifier(random_state=42)
             random_search = RandomizedSearchCV(
                 rf,
-                param_distributions,
+                PARAM_DISTRIBUTIONS,
                 n_iter=10,
                 cv=3,
                 scoring="accuracy",
@@ -108,6 +173,24 @@ class ModelTraining:
             logger.error(f"Error while hyperparameter tuning: {e}")
             raise CustomException(str(e))
 
+    def evaluate_candidate(self, params, X_train, y_train, X_test, y_test):
+        """
+        Score one hyperparameter candidate (3-fold CV accuracy, as in the
+        randomized search), then fit it on the training set and test it.
+        """
+        try:
+            rf = RandomForestClassifier(random_state=42, **params)
+            cv_score = cross_val_score(
+                rf, X_train, y_train, cv=3, scoring="accuracy"
+            ).mean()
+            rf.fit(X_train, y_train)
+            accuracy = accuracy_score(y_test, rf.predict(X_test))
+            logger.info(f"Candidate {params}: cv={cv_score:.4f} test={accuracy:.4f}")
+            return rf, cv_score, accuracy
+        except Exception as e:
+            logger.error(f"Error while evaluating candidate {params}: {e}")
+            raise CustomException(str(e), sys)
+
     def train_and_evaluate(self, X_train, y_train, X_test, y_test):
         """
         Train the model using best parameters and evaluate it.
@@ -124,7 +207,9 @@ class ModelTraining:
             logger.info(f"Accuracy is: {accuracy}")
 
             # Save the trained model
-            self.save_model(best_rf)
+            self.save_model(
+                best_rf, metadata={"accuracy": accuracy, **best_rf.get_params()}
+            )
 
             return accuracy
 
@@ -132,17 +217,41 @@ class ModelTraining:
             logger.error(f"Error while model training: {e}")
             raise CustomException(str(e))
 
-    def save_model(self, model):
+    def save_model(self, model, metadata=None, transformer=None):
         """
-        Save the trained model to a .pkl file.
+        Register the trained model, with the FeatureTransformer it was trained
+        with, as a new version and update the legacy .pkl and transformer.
+
+        `transformer` defaults to the one DataProcessing saved next to the
+        legacy model.
         """
         try:
-            model_filename = f"{self.model_save_path}random_forest_model.pkl"
+            transformer_path = os.path.join(
+                self.model_save_path, "feature_transformer.json"
+            )
+            if transformer is None and os.path.exists(transformer_path):
+                transformer = FeatureTransformer.load(transformer_path)
+            if transformer is None:
+                logger.warning("No feature transformer found to register")
 
-            with open(model_filename, "wb") as model_file:
-                pickle.dump(model, model_file)
+            version = self.registry.register(
+                model, metadata=metadata, transformer=transformer
+            )
+
+            # Keep the legacy path current, written atomically so a reader
+            # never sees a half-written pickle
+            model_filename = os.path.join(
+                self.model_save_path, "random_forest_model.pkl"
+            )
+            atomic_write(model_filename, lambda f: pickle.dump(model, f))
+            save_forest(
+                model, os.path.join(self.model_save_path, "random_forest_model.forest")
+            )
+            if transformer is not None:
+                transformer.save(transformer_path)
 
-            logger.info(f"Model saved at {model_filename}")
+            logger.info(f"Model version {version} saved at {model_filename}")
+            return version
         except Exception as e:
             logger.error(f"Error while saving model: {e}")
             raise CustomException(str(e))
@@ -163,7 +272,7 @@ class ModelTraining:
 
 if __name__ == "__main__":
     # Instantiate feature store
-    feature_store = RedisFeatureStore()
+    feature_store = get_feature_store()
 
     # Create and run model training pipeline
     model_trainer = ModelTraining(feature_store)
@@ -0,0 +1,96 @@
+import collections
+import sys
+import threading
+import time
+
+
+class StackSampler:
+    """
+    In-process sampling profiler for the serving workers.
+
+    Periodically snapshots the stacks of all threads (except its own) with
+    `sys._current_frames()` and aggregates them in the folded format
+    ("outer;inner;leaf count") read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._counts = collections.Counter()
+        self._thread = None
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+    def _fold(self, frame):
+        labels = []
+        while frame is not None:
+            labels.append(self._frame_label(frame))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def start(self, duration, interval=None, on_done=None):
+        """
+        Sample all other threads on a background thread for `duration` seconds.
+
+        Returns immediately, so the request that started the profile does not
+        hold the worker's request thread; `on_done(counts)` is called when
+        sampling ends, after `duration` or an early `stop()`.
+        """
+        interval = self.interval if interval is None else interval
+        if not interval > 0 or not duration > 0:
+            raise ValueError("duration and interval must be positive")
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already being captured")
+
+        self._stop = threading.Event()
+        self._counts = collections.Counter()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(duration, interval, on_done),
+            name="stack-sampler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """End the running profile early and return its stack counts."""
+        self._stop.set()
+        return self.join()
+
+    def join(self):
+        """Wait for the running profile to finish and return its stack counts."""
+        if self._thread is not None:
+            self._thread.join()
+        return self._counts
+
+    def sample(self, duration, interval=None):
+        """Sample all other threads for `duration` seconds and return stack counts."""
+        self.start(duration, interval)
+        return self.join()
+
+    def _run(self, duration, interval, on_done):
+        try:
+            own_thread = threading.get_ident()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline and not self._stop.is_set():
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_thread:
+                        self._counts[self._fold(frame)] += 1
+                self._stop.wait(interval)
+            if on_done is not None:
+                on_done(self._counts)
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def folded(counts):
+        """Render stack counts as folded-stack text, most frequent first."""
+        return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
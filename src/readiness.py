@@ -0,0 +1,77 @@
+import threading
+import time
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WarmUp:
+    """
+    Runs the app's startup steps on a background thread.
+
+    The process can answer liveness checks while models and reference data
+    load. Steps run in order; a failing step is retried with exponential
+    backoff (capped at `retry_cap` seconds) until it succeeds, and `ready` is
+    set only once every step has succeeded.
+    """
+
+    def __init__(self, steps, retry_base=1.0, retry_cap=30.0):
+        self.steps = list(steps)  # [(name, callable), ...]
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.ready = threading.Event()
+        self._status = {name: "pending" for name, _ in self.steps}
+        self._started = time.monotonic()
+        self._ready_seconds = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the steps on a background thread; later calls do nothing."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._started = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run, name="warm-up", daemon=True
+            )
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until ready (or the timeout passes); returns readiness."""
+        # is_set() skips the condition lock on every request once ready
+        return self.ready.is_set() or self.ready.wait(timeout)
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "ready_seconds": self._ready_seconds,
+            "steps": dict(self._status),
+        }
+
+    def _run(self):
+        for name, step in self.steps:
+            delay = self.retry_base
+            while True:
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    self._status[name] = f"failed: {e}"
+                    logger.error(
+                        f"Warm-up step {name} failed, retrying in {delay}s: {e}"
+                    )
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.retry_cap)
+                    continue
+                self._status[name] = "ok"
+                logger.info(
+                    f"Warm-up step {name} done in {time.perf_counter() - start:.2f}s"
+                )
+                break
+
+        self._ready_seconds = round(time.monotonic() - self._started, 3)
+        self.ready.set()
+        logger.info(f"Ready after {self._ready_seconds}s")
@@ -0,0 +1,94 @@
+import queue
+import random
+import threading
+import time
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ShadowScorer:
+    """
+    Score a sample of live requests with a second (shadow) model.
+
+    `submit` only samples, copies the feature rows and does a non-blocking
+    put on a bounded queue; a daemon thread scores them and reports through
+    `on_result(agreed_rows, total_rows, shadow_seconds)`, where rows agree
+    when both models predict the same class label. When the queue is full
+    the work is dropped (`on_drop`), so a slow shadow model can never hold
+    up the primary response.
+
+    The scoring thread still shares the worker's GIL with request threads,
+    so shadow work costs primary latency roughly in proportion to the rows
+    it scores: `sample_rate` and `max_rows` (rows kept per sampled request)
+    bound that cost.
+    """
+
+    def __init__(
+        self,
+        predictor,
+        sample_rate=0.1,
+        max_rows=64,
+        max_queue=1000,
+        on_result=None,
+        on_drop=None,
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in [0, 1], got {sample_rate}")
+        if max_rows < 1:
+            raise ValueError(f"max_rows must be at least 1, got {max_rows}")
+        self.predictor = predictor
+        self.sample_rate = sample_rate
+        self.max_rows = max_rows
+        self.on_result = on_result
+        self.on_drop = on_drop
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="shadow-scorer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, features, primary_labels):
+        """
+        Queue a sampled request for shadow scoring; returns True if queued.
+
+        `primary_labels` are the class labels the primary model predicted
+        (not argmax indices: the two models may order their classes apart).
+        """
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+        try:
+            # Copy: callers pass reusable per-thread row buffers
+            self._queue.put_nowait(
+                (
+                    np.array(features[: self.max_rows], copy=True),
+                    np.array(primary_labels[: self.max_rows], copy=True),
+                )
+            )
+            return True
+        except queue.Full:
+            if self.on_drop is not None:
+                self.on_drop()
+            return False
+
+    def join(self):
+        """Block until every queued request has been scored."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            features, primary_labels = self._queue.get()
+            try:
+                start = time.perf_counter()
+                shadow_proba = self.predictor.predict_proba(features)
+                elapsed = time.perf_counter() - start
+
+                shadow_labels = self.predictor.classes_[shadow_proba.argmax(axis=1)]
+                agreed = int((shadow_labels == primary_labels).sum())
+                if self.on_result is not None:
+                    self.on_result(agreed, len(features), elapsed)
+            except Exception as e:
+                logger.error(f"Shadow scoring failed: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,28 @@
+"""Shared test helpers: feature batches and fakeredis-backed feature stores."""
+
+import pytest
+
+
+def make_batch(n, start=1, positive_every=2):
+    """Entity i has Age = i; every `positive_every`-th entity (from 1) survived."""
+    return {
+        eid: {"Age": float(eid), "Survived": int(eid % positive_every == 1)}
+        for eid in range(start, start + n)
+    }
+
+
+@pytest.fixture
+def fake_redis_store():
+    """Factory for RedisFeatureStores, each on its own fakeredis server (one "node")."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from src.feature_store import RedisFeatureStore
+
+    def make(name="node"):
+        client = fakeredis.FakeRedis(
+            server=fakeredis.FakeServer(), decode_responses=True
+        )
+        return RedisFeatureStore(
+            redis_url=f"redis://{name}:6379/0", client=client, background_gc=False
+        )
+
+    return make
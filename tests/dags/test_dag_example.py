@@ -4,7 +4,8 @@ import os
 import logging
 from contextlib import contextmanager
 import pytest
-from airflow.models import DagBag
+
+DagBag = pytest.importorskip("airflow.models").DagBag
 
 
 @contextmanager
@@ -0,0 +1,28 @@
+"""DagBag import test for the training pipeline (skipped without Airflow)."""
+
+import os
+
+import pytest
+
+DagBag = pytest.importorskip("airflow.models").DagBag
+
+DAGS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "dags")
+
+
+@pytest.fixture(scope="module")
+def dag_bag():
+    return DagBag(dag_folder=DAGS_DIR, include_examples=False)
+
+
+def test_training_pipeline_imports(dag_bag):
+    assert not dag_bag.import_errors
+    assert dag_bag.get_dag("survivor_training_pipeline") is not None
+
+
+def test_register_best_receives_the_process_output(dag_bag):
+    # process returns the run's transformer_path, registered with the model
+    dag = dag_bag.get_dag("survivor_training_pipeline")
+    register_best = dag.get_task("register_best")
+    processed = register_best.op_args[0]
+    assert processed.operator.task_id == "process"
+    assert {"process", "train_candidate"} <= register_best.upstream_task_ids
@@ -0,0 +1,77 @@
+"""Tests for the offline batch scoring job."""
+
+import pickle
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from config.paths_config import MODEL_PATH, TEST_PATH, TRANSFORMER_PATH
+from src.batch_scoring import BatchScoring
+from src.feature_transformer import FeatureTransformer
+from src.model_registry import ModelRegistry
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_scores_match_model(tmp_path, workers):
+    output = tmp_path / "predictions.parquet"
+    BatchScoring(
+        TEST_PATH, str(output), model_path=MODEL_PATH, chunk_size=50, workers=workers
+    ).run()
+
+    raw = pd.read_csv(TEST_PATH)
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    features = FeatureTransformer.load(TRANSFORMER_PATH).transform_array(raw)
+    expected = model.predict_proba(features)[:, 1]
+
+    scored = pd.read_parquet(output)
+    assert list(scored["PassengerId"]) == list(raw["PassengerId"])
+    assert scored["probability"].to_numpy() == pytest.approx(expected)
+    assert not (tmp_path / "predictions.parquet.tmp").exists()
+
+
+def test_chunk_with_all_names_missing_is_scored(tmp_path):
+    raw = pd.read_csv(TEST_PATH).head(20)
+    raw.loc[10:, "Name"] = None  # The second chunk has no Name values at all
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+
+    output = tmp_path / "predictions.parquet"
+    BatchScoring(
+        str(tmp_path / "raw.csv"),
+        str(output),
+        model_path=MODEL_PATH,
+        chunk_size=10,
+        workers=1,
+    ).run()
+    assert len(pd.read_parquet(output)) == 20
+
+
+def test_failed_run_leaves_no_partial_output(tmp_path):
+    raw = pd.read_csv(TEST_PATH).head(20)
+    raw.loc[15, "Pclass"] = "first"  # Not a number: the second chunk fails
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+
+    output = tmp_path / "predictions.parquet"
+    job = BatchScoring(
+        str(tmp_path / "raw.csv"),
+        str(output),
+        model_path=MODEL_PATH,
+        chunk_size=10,
+        workers=1,
+    )
+    with pytest.raises(Exception):
+        job.run()
+    assert list(tmp_path.iterdir()) == [tmp_path / "raw.csv"]
+
+
+def test_default_model_is_the_registry_latest(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    job = BatchScoring(TEST_PATH, str(tmp_path / "out.parquet"), registry=registry)
+    assert job.model_path == MODEL_PATH  # Nothing registered yet
+
+    with open(MODEL_PATH, "rb") as f:
+        version = registry.register(pickle.load(f))
+    job = BatchScoring(TEST_PATH, str(tmp_path / "out.parquet"), registry=registry)
+    assert job.model_path == registry.model_path(version)
@@ -0,0 +1,102 @@
+"""Tests for the vectorized drift detector, including parity with alibi-detect."""
+
+import warnings
+
+import numpy as np
+import pytest
+from scipy.stats import chi2_contingency, ks_2samp
+
+from src.drift import DriftDetector
+
+CATEGORICAL = [2, 3, 4, 8]
+
+
+def reference(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = [rng.normal(size=n), rng.exponential(size=n)]
+    columns += [rng.integers(1, 4, n), rng.integers(0, 2, n), rng.integers(0, 3, n)]
+    columns += [rng.integers(1, 8, n), rng.integers(0, 2, n), rng.integers(0, 2, n)]
+    columns += [rng.integers(0, 5, n), rng.normal(size=n), rng.normal(size=n)]
+    return np.column_stack(columns).astype(np.float64)
+
+
+def batches(x_ref, seed=1):
+    """Same-distribution, shifted and unseen-category batches of several sizes."""
+    rng = np.random.default_rng(seed)
+    for size in (1, 2, 7, 60, len(x_ref)):
+        same = x_ref[rng.integers(0, len(x_ref), size)]
+        shifted = same.copy()
+        shifted[:, [0, 9]] += 0.5
+        unseen = same.copy()
+        unseen[:, 8] = 9
+        yield from (same, shifted, unseen)
+
+
+def test_matches_scipy_per_feature():
+    x_ref = reference()
+    detector = DriftDetector(x_ref, categorical=CATEGORICAL)
+    for x in batches(x_ref):
+        p_val, distance = detector.feature_score(x)
+        for f in range(11):
+            if f in CATEGORICAL:
+                categories = np.union1d(x_ref[:, f], x[:, f])
+                table = np.array(
+                    [
+                        [(sample[:, f] == c).sum() for c in categories]
+                        for sample in (x_ref, x)
+                    ]
+                )
+                expected = (
+                    chi2_contingency(table)[:2] if len(categories) > 1 else (0, 1)
+                )
+            else:
+                expected = ks_2samp(x_ref[:, f], x[:, f], mode="asymp")
+            assert distance[f] == pytest.approx(expected[0], rel=1e-6, abs=1e-7)
+            assert p_val[f] == pytest.approx(expected[1], rel=1e-6, abs=1e-7)
+
+
+def test_bonferroni_batch_and_feature_drift():
+    x_ref = reference()
+    detector = DriftDetector(x_ref, p_val=0.05)
+    shifted = x_ref + np.eye(11)[0] * 2  # Only feature 0 moves
+
+    batch = detector.predict(shifted)["data"]
+    assert batch["is_drift"] == 1 and batch["threshold"] == pytest.approx(0.05 / 11)
+
+    per_feature = detector.predict(shifted, drift_type="feature")["data"]
+    assert per_feature["is_drift"][0] == 1 and per_feature["is_drift"][1:].sum() == 0
+    assert detector.predict(x_ref)["data"]["is_drift"] == 0
+
+
+def test_psi_is_zero_on_reference_and_grows_with_shift():
+    x_ref = reference()
+    detector = DriftDetector(x_ref, categorical=CATEGORICAL)
+    assert np.allclose(detector.psi(x_ref), 0)
+    assert (detector.psi(x_ref + 1)[detector.continuous] > 0.2).all()
+
+
+def test_rejects_wrong_feature_count():
+    with pytest.raises(ValueError):
+        DriftDetector(reference()).predict(np.zeros((1, 10)))
+
+
+@pytest.mark.parametrize("tabular", [False, True])
+def test_parity_with_alibi_detect(tabular):
+    cd = pytest.importorskip("alibi_detect.cd")
+    x_ref = reference()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if tabular:
+            alibi = cd.TabularDrift(
+                x_ref, p_val=0.05, categories_per_feature={f: None for f in CATEGORICAL}
+            )
+        else:
+            alibi = cd.KSDrift(x_ref, p_val=0.05)
+    detector = DriftDetector(x_ref, categorical=CATEGORICAL if tabular else ())
+
+    for x in batches(x_ref):
+        expected, actual = alibi.predict(x)["data"], detector.predict(x)["data"]
+        assert actual["is_drift"] == expected["is_drift"]
+        assert actual["threshold"] == expected["threshold"]
+        np.testing.assert_allclose(actual["p_val"], expected["p_val"], rtol=1e-6)
+        np.testing.assert_allclose(actual["distance"], expected["distance"], rtol=1e-6)
@@ -0,0 +1,121 @@
+"""Tests for the bounded, class-stratified drift reference and its storage."""
+
+import numpy as np
+
+from src.drift_reference import DriftReference, KLLSketch, load_drift_reference
+from src.local_feature_store import LocalFeatureStore
+from tests.conftest import make_batch
+
+FEATURES = ["Age"]
+
+
+def test_reservoir_is_bounded_stratified_and_uniform():
+    reference = DriftReference(capacity=500, sketch_k=0, feature_names=FEATURES)
+    for start in range(0, 20000, 2500):  # Incremental batches
+        reference.add_batch(make_batch(2500, start=start, positive_every=10))
+
+    assert reference.seen == 20000
+    assert {label: len(s["rows"]) for label, s in reference.classes.items()} == {
+        "0": 500,
+        "1": 500,
+    }
+    # Every entity equally likely to be kept: mean Age close to the stream's
+    ages = reference.classes["0"]["rows"][:, 0]
+    assert abs(ages.mean() - 10000) < 1000
+
+    sample = reference.sample()
+    assert sample.shape == (500, 1)
+    assert (sample[:, 0] % 10 == 1).sum() == 50  # The store's 10% class mix, exactly
+
+
+def test_single_adds_match_algorithm_r_bounds():
+    reference = DriftReference(capacity=5, sketch_k=0, feature_names=FEATURES)
+    for features in make_batch(50, positive_every=10).values():
+        reference.add(features)
+    assert reference.seen == 50
+    assert all(len(s["rows"]) == 5 for s in reference.classes.values())
+
+
+def test_kll_sketch_is_small_and_accurate():
+    values = np.random.default_rng(0).normal(size=200_000)
+    sketch = KLLSketch(k=200)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    assert sketch.n == len(values)
+    assert sum(len(level) for level in sketch.levels) < 1000
+    qs = np.linspace(0.01, 0.99, 99)
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles(qs)) / len(values)
+    assert np.abs(ranks - qs).max() < 0.03
+
+
+def test_json_roundtrip_with_sketches():
+    reference = DriftReference(capacity=100, sketch_k=50, feature_names=FEATURES)
+    reference.add_batch(make_batch(1000, positive_every=10))
+    restored = DriftReference.from_json(reference.to_json())
+
+    assert restored.seen == 1000
+    np.testing.assert_array_equal(restored.sample(), reference.sample())
+    # Sketch-based reference: per-feature quantiles, one row per grid point
+    quantiles = restored.reference()
+    assert quantiles.shape == (100, 1)
+    assert np.all(np.diff(quantiles[:, 0]) >= 0)
+    assert abs(np.median(quantiles[:, 0]) - 500) < 50
+
+
+def test_sketch_mode_keeps_exact_category_shares():
+    reference = DriftReference(
+        capacity=100, sketch_k=50, feature_names=["Age", "Pclass"]
+    )
+    pclass = np.repeat([1.0, 2.0, 3.0], [200, 300, 500])
+    rows = np.column_stack([np.arange(1000.0), pclass])
+    reference.add_rows(rows, [0] * 1000)
+    restored = DriftReference.from_json(reference.to_json())
+
+    values, counts = np.unique(restored.reference()[:, 1], return_counts=True)
+    assert dict(zip(values, counts)) == {1.0: 20, 2.0: 30, 3.0: 50}
+
+
+def test_redis_store_keeps_reference_with_snapshot(fake_redis_store):
+    store = fake_redis_store()
+    version = store.store_batch_features(make_batch(300))
+    assert store.get_drift_reference().seen == 300
+
+    store.store_features(5, {"Age": 1.0, "Survived": 0})  # Update: not counted
+    store.store_features(1000, {"Age": 1.0, "Survived": 1})  # New entity
+    assert store.get_drift_reference().seen == 301
+
+    for _ in range(2):
+        store.store_batch_features(make_batch(10))
+    assert store.get_drift_reference(version) is None  # Collected with its snapshot
+
+
+def test_missing_reference_is_built_by_scanning(tmp_path):
+    store = LocalFeatureStore(str(tmp_path))
+    version = store.store_batch_features(make_batch(120))
+    assert store.get_drift_reference(version).seen == 120
+
+    (tmp_path / f"v{version}" / "drift_reference.json").unlink()
+    assert load_drift_reference(store).seen == 120
+
+
+def test_redis_store_folds_new_entities_in_batches(fake_redis_store, monkeypatch):
+    from src import feature_store
+
+    monkeypatch.setattr(feature_store, "DRIFT_REFERENCE_FOLD_BATCH", 3)
+    store = fake_redis_store()
+    client = store.client
+    version = store.store_batch_features(make_batch(300))
+
+    for eid in range(1000, 1007):
+        store.store_features(eid, {"Age": 1.0, "Survived": 1})
+
+    # Two batches of three folded in; the seventh is still queued
+    stored = DriftReference.from_json(client.get(store._reference_key(version)))
+    assert stored.seen == 306
+    assert client.llen(store._pending_key(version)) == 1
+    assert store.get_drift_reference().seen == 307
+
+    for _ in range(2):
+        store.store_batch_features(make_batch(10))
+    assert not client.exists(store._pending_key(version))
@@ -0,0 +1,138 @@
+"""Tests for the Redis feature store against in-memory fakeredis servers."""
+
+from src.feature_store import HashRing, ShardedRedisFeatureStore
+from tests.conftest import make_batch
+
+
+def test_batch_roundtrip_single_node(fake_redis_store):
+    store = fake_redis_store("single")
+    batch = make_batch(2500)
+    store.store_batch_features(batch)
+
+    assert store.get_features(10) == batch[10]
+    assert store.get_batch_features([3, 2, 9999]) == {
+        3: batch[3],
+        2: batch[2],
+        9999: None,
+    }
+    assert sorted(map(int, store.get_all_entity_ids())) == list(batch)
+
+
+def test_sharded_store_spreads_and_merges(fake_redis_store):
+    shards = [fake_redis_store(f"shard-{i}") for i in range(3)]
+    store = ShardedRedisFeatureStore(shards=shards)
+    batch = make_batch(3000)
+    store.store_batch_features(batch)
+
+    # Every shard holds part of the data and nothing is duplicated
+    version = store.current_version()
+    per_shard = [len(shard.get_all_entity_ids(version)) for shard in shards]
+    assert all(count > 0 for count in per_shard)
+    assert sum(per_shard) == len(batch)
+
+    ids = [2999, 1, 1500, 42]
+    assert list(store.get_batch_features(ids)) == ids
+    assert store.get_batch_features(ids) == {eid: batch[eid] for eid in ids}
+    assert store.get_features("7") == batch[7]
+    assert sorted(map(int, store.get_all_entity_ids())) == list(batch)
+
+
+def test_hash_ring_moves_few_keys_when_a_node_is_added():
+    keys = [str(i) for i in range(5000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = sum(before.get_node(k) != after.get_node(k) for k in keys)
+    assert moved / len(keys) < 0.4
+
+
+def test_reload_swaps_snapshot_and_collects_old_versions(fake_redis_store):
+    store = fake_redis_store("snapshots")
+    first = store.store_batch_features(make_batch(10))
+    second = store.store_batch_features({1: {"Age": 99.0}, 2: {"Age": 98.0}})
+
+    # Readers see only the new snapshot, never a mix of both loads
+    assert store.current_version() == second
+    assert sorted(map(int, store.get_all_entity_ids())) == [1, 2]
+    assert store.get_batch_features([1, 3]) == {1: {"Age": 99.0}, 3: None}
+
+    # The previous snapshot stays readable for in-flight batches until the
+    # next reload, then it is garbage-collected
+    assert store.get_features(3, version=first) == {"Age": 3.0, "Survived": 1}
+    third = store.store_batch_features({5: {"Age": 5.0}})
+    assert store.stale_versions(third) == []
+    assert store.get_features(3, version=first) is None
+    assert not store.client.exists(f"v{first}:entities")
+
+
+def test_unpublished_snapshot_is_invisible(fake_redis_store):
+    store = fake_redis_store("failed-load")
+    version = store.store_batch_features(make_batch(3))
+
+    # A reload that dies after writing part of its data
+    failed = store.begin_version()
+    store.write_version({1: {"Age": -1.0}}, failed)
+
+    assert store.current_version() == version
+    assert store.get_features(1) == make_batch(3)[1]
+
+
+def test_older_load_cannot_publish_over_a_newer_one(fake_redis_store):
+    store = fake_redis_store("cas")
+    slow = store.begin_version()  # Started first, finishes last
+    store.write_version({1: {"Age": 1.0}}, slow)
+    fast = store.store_batch_features({1: {"Age": 2.0}})
+
+    assert store.publish_version(slow) == (False, fast)
+    assert store.current_version() == fast
+    assert store.get_features(1) == {"Age": 2.0}
+
+
+def test_gc_skips_versions_still_being_written(fake_redis_store, monkeypatch):
+    from src import feature_store
+
+    store = fake_redis_store("in-flight")
+    loading = store.begin_version()
+    store.write_version({1: {"Age": 1.0}}, loading)
+    for _ in range(3):
+        latest = store.store_batch_features(make_batch(2))
+
+    assert loading not in store.stale_versions(latest, keep=1)
+    assert store.get_features(1, version=loading) == {"Age": 1.0}
+
+    # Left unpublished long enough, it is a failed load and is collected
+    monkeypatch.setattr(feature_store, "ABANDONED_AFTER", -1)
+    assert loading in store.garbage_collect(latest)
+    assert store.get_features(1, version=loading) is None
+
+
+def test_first_snapshot_removes_unversioned_keys(fake_redis_store):
+    store = fake_redis_store("legacy")
+    store.store_features(7, {"Age": 7.0})  # Written before any snapshot existed
+    assert store.get_features(7) == {"Age": 7.0}
+
+    store.store_batch_features(make_batch(3))
+    assert store.client.keys("entity:*") == []
+    assert store.get_features(1) == make_batch(3)[1]
+
+
+def test_pool_stats_reads_pool_usage_and_tolerates_missing_internals(monkeypatch):
+    from src import feature_store
+
+    monkeypatch.setattr(feature_store, "_pools", {})
+    feature_store.get_connection_pool("redis://stats-host:6379/0")
+    monkeypatch.setitem(feature_store._pools, "redis://opaque:6379/0", object())
+
+    stats = feature_store.pool_stats()
+    assert stats["redis://stats-host:6379/0"] == {
+        "max": feature_store.REDIS_MAX_CONNECTIONS,
+        "created": 0,
+        "in_use": 0,
+        "available": 0,
+    }
+    assert stats["redis://opaque:6379/0"] == {
+        "max": None,
+        "created": None,
+        "in_use": None,
+        "available": None,
+    }
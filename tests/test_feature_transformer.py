@@ -0,0 +1,108 @@
+"""Tests for the shared feature transformer used by training and serving."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.feature_transformer import FeatureTransformer, FEATURE_NAMES
+
+RAW_ROWS = [
+    {
+        "PassengerId": 1,
+        "Pclass": 3,
+        "Name": "Braund, Mr. Owen Harris",
+        "Sex": "male",
+        "Age": 22.0,
+        "SibSp": 1,
+        "Parch": 0,
+        "Fare": 7.25,
+        "Cabin": None,
+        "Embarked": "S",
+    },
+    {
+        "PassengerId": 2,
+        "Pclass": 1,
+        "Name": "Cumings, Mrs. John Bradley",
+        "Sex": "female",
+        "Age": None,
+        "SibSp": 0,
+        "Parch": 0,
+        "Fare": 71.2833,
+        "Cabin": "C85",
+        "Embarked": None,
+    },
+    {
+        "PassengerId": 3,
+        "Pclass": 2,
+        "Name": "Uruchurtu, Don. Manuel E",
+        "Sex": "male",
+        "Age": 40.0,
+        "SibSp": 0,
+        "Parch": 2,
+        "Fare": 27.72,
+        "Cabin": None,
+        "Embarked": "C",
+    },
+]
+
+
+@pytest.fixture
+def raw_df():
+    return pd.DataFrame(RAW_ROWS)
+
+
+def test_transform_fills_and_encodes(raw_df):
+    transformer = FeatureTransformer().fit(raw_df)
+    data = transformer.transform(raw_df)
+
+    assert transformer.age_median == 31.0
+    assert transformer.embarked_categories == ["C", "S"]
+    assert data["Age"].tolist() == [22.0, 31.0, 40.0]
+    assert data["Embarked"].tolist() == [1, 0, 0]
+    assert data["Title"].tolist() == [0, 2, 4]
+    assert data["Isalone"].tolist() == [0, 1, 0]
+    assert data["HasCabin"].tolist() == [0, 1, 0]
+    assert data["PassengerId"].tolist() == [1, 2, 3]
+
+
+def test_record_fast_path_matches_batch(raw_df):
+    transformer = FeatureTransformer().fit(raw_df)
+    batch = transformer.transform_array(raw_df)
+    rows = np.vstack([transformer.transform_record(row) for row in RAW_ROWS])
+
+    assert batch.shape == (len(RAW_ROWS), len(FEATURE_NAMES))
+    np.testing.assert_allclose(rows, batch)
+
+
+def test_save_and_load_roundtrip(raw_df, tmp_path):
+    path = tmp_path / "feature_transformer.json"
+    FeatureTransformer().fit(raw_df).save(str(path))
+    loaded = FeatureTransformer.load(str(path))
+
+    np.testing.assert_allclose(
+        loaded.transform_array(raw_df),
+        FeatureTransformer().fit(raw_df).transform_array(raw_df),
+    )
+
+
+def test_record_and_batch_impute_missing_fields_identically(raw_df):
+    transformer = FeatureTransformer().fit(raw_df)
+    records = [
+        {"Pclass": 3, "Name": "Doe, Mr. John", "Sex": "male", "SibSp": None},
+        {"Pclass": 1, "Sex": "female", "Parch": 1, "Fare": None, "Cabin": None},
+        {"Pclass": 2, "Name": None, "Sex": None, "Age": 5.0, "Embarked": "Q"},
+        # Blank strings are missing; numeric strings are parsed
+        {"Pclass": "3", "Sex": "male", "Age": "", "Fare": " ", "Cabin": ""},
+        {"Pclass": 2, "Sex": "female", "Age": "22", "SibSp": "1", "Embarked": ""},
+    ]
+    batch = transformer.transform_array(pd.DataFrame(records))
+    rows = np.vstack([transformer.transform_record(record) for record in records])
+
+    np.testing.assert_allclose(rows, batch)
+    assert batch[:, FEATURE_NAMES.index("Familysize")].tolist() == [
+        1.0,
+        2.0,
+        1.0,
+        1.0,
+        2.0,
+    ]
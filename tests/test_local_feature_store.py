@@ -0,0 +1,74 @@
+"""Tests for the embedded, memory-mapped local feature store."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.local_feature_store import LocalFeatureStore, sync_from_redis
+from tests.conftest import make_batch
+
+
+def write_one(root_dir, matrix, n):
+    """One writer process's snapshot (module level, so it can be pickled)."""
+    return LocalFeatureStore(root_dir).write_snapshot(
+        ["a", "b", "c"], matrix + n, ["x", "y"]
+    )
+
+
+def test_roundtrip_and_snapshot_swap(tmp_path):
+    store = LocalFeatureStore(str(tmp_path))
+    first = store.store_batch_features(make_batch(100))
+
+    features = store.get_features(10)
+    assert features == {"Age": 10.0, "Survived": 0}
+    assert type(features["Survived"]) is int  # Same types as the Redis store
+    assert store.get_batch_features([3, 9999]) == {
+        3: {"Age": 3.0, "Survived": 1},
+        9999: None,
+    }
+
+    # Updates and appends write new snapshots; pinned readers are unaffected
+    _, pinned, _ = store.get_feature_matrix(first)
+    assert store.store_features(10, {"Age": 42.0}) is False
+    assert store.current_version() == first + 1
+    assert store.get_features(10)["Age"] == 42.0
+    assert store.get_features(10, version=first)["Age"] == 10.0
+    assert pinned[9, 0] == 10.0
+    assert store.store_features(101, {"Age": 1.0, "Survived": 1}) is True
+    assert store.current_version() == first + 2
+    assert len(store.get_all_entity_ids()) == 101
+
+    ids, matrix, columns = store.get_feature_matrix()
+    assert matrix.shape == (101, 2) and columns == ["Age", "Survived"]
+
+
+def test_sync_from_redis(tmp_path, fake_redis_store):
+    source = fake_redis_store("sync")
+    source.store_batch_features(make_batch(250))
+
+    local = LocalFeatureStore(str(tmp_path))
+    sync_from_redis(source, local, chunk_size=64)
+
+    assert sorted(map(int, local.get_all_entity_ids())) == list(range(1, 251))
+    assert local.get_features(7) == {"Age": 7.0, "Survived": 1}
+
+
+def test_concurrent_writers_get_distinct_versions(tmp_path):
+    store = LocalFeatureStore(str(tmp_path))
+    matrix = np.arange(6, dtype=np.float64).reshape(3, 2)
+    with ProcessPoolExecutor(4) as pool:
+        versions = list(
+            pool.map(write_one, [str(tmp_path)] * 8, [matrix] * 8, range(8))
+        )
+
+    published = [v for v in versions if v is not None]
+    assert len(set(published)) == len(published)
+    assert store.current_version() == max(published)
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".tmp-")]
+
+
+def test_older_snapshot_cannot_replace_a_newer_one(tmp_path):
+    store = LocalFeatureStore(str(tmp_path))
+    newer = store.store_batch_features(make_batch(3))
+    assert store._publish(newer - 1) is False
+    assert store.current_version() == newer
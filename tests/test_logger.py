@@ -0,0 +1,35 @@
+"""Tests for the structured, asynchronous logging setup."""
+
+import json
+import logging
+
+from src.logger import SAMPLED, DailyFileHandler, JsonFormatter, SamplingFilter
+
+
+def make_record(**extra):
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "hi %s", ("x",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_roll_over_at_day_boundary(tmp_path, monkeypatch):
+    handler = DailyFileHandler(str(tmp_path))
+    handler.setFormatter(JsonFormatter())
+
+    monkeypatch.setattr(DailyFileHandler, "_today", staticmethod(lambda: "2024-01-01"))
+    handler.emit(make_record(rows=3))
+    monkeypatch.setattr(DailyFileHandler, "_today", staticmethod(lambda: "2024-01-02"))
+    handler.emit(make_record())
+    handler.close()
+
+    first = json.loads((tmp_path / "log_2024-01-01.log").read_text())
+    assert first["message"] == "hi x" and first["rows"] == 3
+    assert first["level"] == "INFO" and first["logger"] == "app"
+    assert (tmp_path / "log_2024-01-02.log").exists()
+
+
+def test_sampling_only_applies_to_flagged_records():
+    never = SamplingFilter(rate=0)
+    assert never.filter(make_record())
+    assert not never.filter(make_record(**SAMPLED))
+    assert SamplingFilter(rate=1).filter(make_record(**SAMPLED))
@@ -0,0 +1,61 @@
+"""Tests for the flat, memory-mapped forest format."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model_format import FlatForest, read_header, save_forest
+from src.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def forest():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(300, 4)), rng.integers(0, 2, 300)
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y), X
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_flat_forest_matches_sklearn(tmp_path, forest, mmap):
+    model, X = forest
+    path = tmp_path / "model.forest"
+    save_forest(model, str(path))
+
+    header = read_header(str(path))
+    assert header["schema"]["n_features"] == 4
+    assert header["schema"]["classes"] == [0, 1]
+
+    flat = FlatForest.load(str(path), mmap=mmap)
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X))
+    assert (flat.predict(X[:1]) == model.predict(X[:1])).all()
+    with pytest.raises(ValueError):
+        flat.predict_proba(X[:, :3])
+
+
+@pytest.mark.parametrize("fit_with_nan", [False, True])
+def test_flat_forest_routes_nan_like_sklearn(tmp_path, forest, fit_with_nan):
+    model, X = forest
+    rng = np.random.default_rng(1)
+    if fit_with_nan:
+        X_fit = X.copy()
+        X_fit[rng.random(len(X)) < 0.2, 1] = np.nan
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(
+            X_fit, model.predict(X)
+        )
+    X_nan = X.copy()
+    X_nan[rng.random(len(X)) < 0.5, 1] = np.nan
+    X_nan[rng.random(len(X)) < 0.3, 2] = np.nan
+
+    path = tmp_path / "model.forest"
+    save_forest(model, str(path))
+    flat = FlatForest.load(str(path))
+    np.testing.assert_allclose(flat.predict_proba(X_nan), model.predict_proba(X_nan))
+
+
+def test_registry_loads_flat_format(tmp_path, forest):
+    model, X = forest
+    ModelRegistry(str(tmp_path)).register(model)
+
+    version, flat = ModelRegistry(str(tmp_path), model_format="flat").load()
+    assert version == 1 and isinstance(flat, FlatForest)
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X))
@@ -0,0 +1,120 @@
+"""Tests for the versioned model registry and hot model swap."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.fast_inference import ForestPredictor
+from src.feature_transformer import FEATURE_NAMES, FeatureTransformer
+from src.model_registry import ModelHolder, ModelRegistry, ModelWatcher, ServingModel
+
+
+def make_model(seed):
+    rng = np.random.default_rng(seed)
+    X, y = rng.normal(size=(60, 3)), rng.integers(0, 2, 60)
+    return RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, y)
+
+
+def make_transformer(age_median):
+    return FeatureTransformer.from_dict(
+        {
+            "age_median": age_median,
+            "fare_median": 14.0,
+            "embarked_mode": "S",
+            "embarked_categories": ["C", "Q", "S"],
+        }
+    )
+
+
+def register_one(root_dir, seed):
+    """One registering process (module level, so it can be pickled)."""
+    return ModelRegistry(root_dir).register(make_model(seed), promote=False)
+
+
+def test_register_versions_and_latest(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.latest_version() is None
+
+    first = registry.register(make_model(0), metadata={"accuracy": 0.8})
+    second = registry.register(make_model(1), promote=False)
+
+    assert (first, second) == (1, 2)
+    assert registry.latest_version() == first
+    assert registry.metadata()["accuracy"] == 0.8
+    registry.promote(second)
+    assert registry.load()[0] == second
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".tmp-")]
+
+
+def test_watcher_swaps_warmed_model_and_skips_broken_one(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model = make_model(0)
+    holder = ModelHolder(ServingModel(0, model, ForestPredictor(model)))
+    swapped = []
+    watcher = ModelWatcher(
+        registry, holder, lambda: np.zeros((4, 3)), on_swap=swapped.append
+    )
+
+    assert not watcher.check()
+    registry.register(make_model(1))
+    assert watcher.check()
+    assert holder.current.version == 1 and swapped == [1]
+
+    # A model that can't score the warm-up rows is never swapped in
+    registry.register(make_model(2).fit(np.zeros((4, 5)), [0, 1, 0, 1]))
+    assert not watcher.check()
+    assert holder.current.version == 1
+
+
+def test_transformer_is_versioned_and_swapped_with_its_model(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.register(make_model(0), transformer=make_transformer(30.0))
+    assert registry.load_transformer(first).age_median == 30.0
+
+    model = make_model(0)
+    holder = ModelHolder(
+        ServingModel(first, model, ForestPredictor(model), make_transformer(30.0))
+    )
+    watcher = ModelWatcher(registry, holder, lambda: np.zeros((4, 3)))
+    registry.register(make_model(1), transformer=make_transformer(40.0))
+    assert watcher.check()
+    assert holder.current.transformer.age_median == 40.0
+
+    # A version registered without one keeps the transformer being served
+    registry.register(make_model(2))
+    assert watcher.check()
+    assert holder.current.version == 3
+    assert holder.current.transformer.age_median == 40.0
+
+
+def test_concurrent_registrations_get_distinct_versions(tmp_path):
+    with ProcessPoolExecutor(4) as pool:
+        versions = list(pool.map(register_one, [str(tmp_path)] * 8, range(8)))
+    assert sorted(versions) == list(range(1, 9))
+    assert ModelRegistry(str(tmp_path)).versions() == list(range(1, 9))
+
+
+def test_watcher_rejects_model_with_reordered_features(tmp_path):
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(60, len(FEATURE_NAMES))), rng.integers(0, 2, 60)
+    in_order = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+        pd.DataFrame(X, columns=FEATURE_NAMES), y
+    )
+    reordered = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+        pd.DataFrame(X, columns=FEATURE_NAMES[::-1]), y
+    )
+
+    registry = ModelRegistry(str(tmp_path), model_format="flat")
+    holder = ModelHolder(ServingModel(0, in_order, ForestPredictor(in_order)))
+    watcher = ModelWatcher(registry, holder, lambda: X[:4])
+
+    registry.register(reordered)
+    assert not watcher.check()
+    assert holder.current.version == 0 and watcher._failed_version == 1
+
+    # The flat file carries the names too, so the same order is accepted
+    registry.register(in_order)
+    assert watcher.check()
+    assert holder.current.version == 2
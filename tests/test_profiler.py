@@ -0,0 +1,64 @@
+"""Tests for the background stack sampler behind /debug/profile."""
+
+import threading
+import time
+
+import pytest
+
+from src.profiler import StackSampler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_background_sampler_sees_the_calling_thread():
+    sampler = StackSampler(interval=0.001)
+    done = []
+    sampler.start(0.2, on_done=done.append)
+    assert sampler.busy
+
+    # The thread that started the profile keeps working and is sampled
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        sum(range(1000))
+    counts = sampler.join()
+
+    assert not sampler.busy
+    assert done == [counts]
+    assert any("test_background_sampler_sees_the_calling_thread" in s for s in counts)
+    assert not any("_run (" in s for s in counts)  # Never samples itself
+
+
+def test_stop_ends_the_profile_early():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    sampler = StackSampler(interval=0.001)
+    try:
+        started = time.monotonic()
+        sampler.start(30)
+        time.sleep(0.05)
+        counts = sampler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert time.monotonic() - started < 5
+    assert any("busy_loop" in stack for stack in counts)
+    assert "busy_loop" in StackSampler.folded(counts)
+
+
+def test_rejects_non_positive_interval_and_concurrent_profiles():
+    sampler = StackSampler()
+    for interval in (0, -1, float("nan")):
+        with pytest.raises(ValueError):
+            sampler.start(1, interval=interval)
+    assert not sampler.busy
+
+    sampler.start(5, interval=0.01)
+    with pytest.raises(RuntimeError):
+        sampler.start(1)
+    sampler.stop()
+    assert not sampler.busy
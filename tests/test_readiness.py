@@ -0,0 +1,51 @@
+"""Tests for the background warm-up behind /readyz."""
+
+from src.readiness import WarmUp
+
+
+def test_steps_run_in_order_and_set_ready():
+    calls = []
+    warmup = WarmUp(
+        [("a", lambda: calls.append("a")), ("b", lambda: calls.append("b"))]
+    )
+    assert not warmup.status()["ready"]
+
+    warmup.start()
+    assert warmup.wait(5)
+    assert calls == ["a", "b"]
+    status = warmup.status()
+    assert status["steps"] == {"a": "ok", "b": "ok"}
+    assert status["ready_seconds"] is not None
+
+
+def test_failing_step_is_retried_and_blocks_readiness():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("redis down")
+
+    warmup = WarmUp([("reference", flaky)], retry_base=0.01, retry_cap=0.02)
+    warmup.start()
+    assert warmup.wait(5)
+    assert len(attempts) == 3
+
+
+def test_not_ready_while_a_step_keeps_failing():
+    def down():
+        raise ConnectionError("redis down")
+
+    warmup = WarmUp([("reference", down)], retry_base=0.01, retry_cap=0.01)
+    warmup.start()
+    assert not warmup.wait(0.1)
+    assert warmup.status()["steps"]["reference"] == "failed: redis down"
+
+
+def test_start_is_idempotent():
+    calls = []
+    warmup = WarmUp([("a", lambda: calls.append("a"))])
+    warmup.start()
+    warmup.start()
+    assert warmup.wait(5)
+    assert calls == ["a"]
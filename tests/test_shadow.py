@@ -0,0 +1,72 @@
+"""Tests for off-path shadow model scoring."""
+
+import threading
+
+import numpy as np
+
+from src.shadow import ShadowScorer
+
+
+class ConstantModel:
+    def __init__(self, positive, gate=None, classes=(0, 1)):
+        self.positive = positive
+        self.gate = gate
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        if self.gate is not None:
+            self.gate.wait()
+        p = np.full(len(X), 0.9 if self.positive else 0.1)
+        return np.column_stack([1 - p, p])
+
+
+def test_records_agreement_and_copies_rows():
+    results = []
+    scorer = ShadowScorer(
+        ConstantModel(True), sample_rate=1.0, on_result=lambda *r: results.append(r)
+    )
+    rows = np.zeros((3, 2))
+    primary = np.array([1, 0, 1])
+
+    assert scorer.submit(rows, primary)
+    rows[:] = 1  # Caller reuses its buffer immediately
+    scorer.join()
+
+    agreed, total, seconds = results[0]
+    assert (agreed, total) == (2, 3) and seconds >= 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    gate, drops = threading.Event(), []
+    scorer = ShadowScorer(
+        ConstantModel(True, gate),
+        sample_rate=1.0,
+        max_queue=1,
+        on_drop=lambda: drops.append(1),
+    )
+    primary = np.array([1])
+    submitted = [scorer.submit(np.zeros((1, 2)), primary) for _ in range(5)]
+    gate.set()
+    scorer.join()
+
+    # One row in flight, one queued, the rest dropped
+    assert submitted.count(True) <= 2 and len(drops) == submitted.count(False)
+    assert not ShadowScorer(ConstantModel(True), sample_rate=0).submit(
+        np.zeros((1, 2)), primary
+    )
+
+
+def test_agreement_compares_class_labels_and_caps_rows():
+    results = []
+    # The shadow model orders its classes the other way round
+    scorer = ShadowScorer(
+        ConstantModel(False, classes=(1, 0)),
+        sample_rate=1.0,
+        max_rows=2,
+        on_result=lambda *r: results.append(r),
+    )
+    assert scorer.submit(np.zeros((5, 2)), np.array([1, 1, 0, 1, 1]))
+    scorer.join()
+
+    agreed, total, _ = results[0]
+    assert (agreed, total) == (2, 2)